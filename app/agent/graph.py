@@ -1,32 +1,219 @@
 # Single-agent graph with web search and doc retrieval, producing a draft report.
-from typing import Dict, Any
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Callable, ContextManager, Dict, Any, Iterable, Iterator, List, Tuple
 
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
+from prometheus_client import Counter
 
 from app.models import ResearchState, ResearchRequest
-from app.tools.web_search import web_search
-from app.tools.doc_store import query_docs
+from app.tools.web_search import collect_web_searches, submit_web_search, web_search_many
+from app.tools.doc_store import query_docs_many, submit_doc_search
 from app.report.generator import generate_draft_report
 from app.config import settings
+from app.cache import SingleFlight, TTLCache, make_key, normalize_text
+from app.agent.semantic_cache import SemanticCache
+from app.agent.synthesis import build_messages, pack_evidence, parse_sections, stream_synthesis
+from app.telemetry import NODE_LATENCY, RESULT_SIZE, record_exception, span, timed_tool
+from app.tools.near_dup import NEAR_DUP_BYTES_SAVED, suppress_near_duplicates
 
 
 
-llm = ChatGoogleGenerativeAI(model= settings.gemini_model_name, api_key=settings.gemini_api_key,temperature=0.3)
+# Gemini client is built on first use; importing this module stays cheap
+llm = None
+_llm_lock = threading.Lock()
 
 
+def get_llm():
+    global llm
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                llm = ChatGoogleGenerativeAI(
+                    model=settings.gemini_model_name,
+                    api_key=settings.gemini_api_key,
+                    temperature=0.3,
+                    timeout=settings.llm_timeout_seconds,
+                    max_retries=settings.llm_max_retries,
+                    max_output_tokens=settings.llm_max_output_tokens,
+                )
+    return llm
+
+
+def _timed(node_name: str) -> Callable:
+    """
+    Record the node's wall-clock time under state.timings[node_name], in the
+    node latency histogram (labelled by outcome) and as a trace span.
+    """
+    def decorator(fn: Callable[[ResearchState], Dict[str, Any]]):
+        @wraps(fn)
+        def wrapper(state: ResearchState) -> Dict[str, Any]:
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                with span(f"node.{node_name}"):
+                    update = fn(state)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                NODE_LATENCY.labels(node=node_name, outcome=outcome).observe(elapsed)
+            update["timings"] = {node_name: elapsed}
+            return update
+        return wrapper
+    return decorator
+
+
+def expand_queries(state: ResearchState) -> List[str]:
+    """The request's query plus one sub-query per competitor and one for the industry."""
+    queries = [state.query]
+    if settings.query_expansion_enabled:
+        queries += [f"{state.query} {c.strip()}" for c in state.competitors or [] if c.strip()]
+        if state.industry and state.industry.strip():
+            queries.append(f"{state.query} {state.industry.strip()} industry")
+
+    seen = set()
+    unique = []
+    for q in queries:
+        if normalize_text(q) not in seen:
+            seen.add(normalize_text(q))
+            unique.append(q)
+    return unique
+
+
+def _interleave_unique(result_lists: Iterable[List[Any]], key: Callable[[Any], str]) -> List[Any]:
+    """Round-robin merge of per-query rankings, keeping the first occurrence of each key."""
+    merged, seen = [], set()
+    result_lists = [list(results) for results in result_lists]
+    for rank in range(max((len(r) for r in result_lists), default=0)):
+        for results in result_lists:
+            if rank < len(results) and key(results[rank]) not in seen:
+                seen.add(key(results[rank]))
+                merged.append(results[rank])
+    return merged
+
+
+def _remaining_budget(state: ResearchState) -> float | None:
+    """Seconds left for retrieval, keeping back time for synthesis and report generation."""
+    if state.deadline is None:
+        return None
+    total = state.deadline_seconds or settings.research_deadline_seconds
+    reserve = settings.deadline_reserve_seconds
+    if settings.llm_synthesis_enabled:
+        # A short deadline shrinks the synthesis share instead of starving retrieval
+        reserve += min(settings.llm_synthesis_budget_seconds, settings.llm_synthesis_budget_fraction * total)
+    reserve = min(reserve, (1.0 - settings.retrieval_min_budget_fraction) * total)
+    return max(0.0, state.deadline - time.time() - reserve)
+
+
+def _merge_web_results(per_query: List[List[Any] | None], limit: int) -> Dict[str, Any]:
+    """
+    State update from per-sub-query web results (None: that search timed out or failed),
+    cut back to the request's limit so expansion doesn't multiply the payload.
+    """
+    results = _interleave_unique([r for r in per_query if r], key=lambda r: r.url)
+    with timed_tool("dedup", "minhash", items=len(results)):
+        # Syndicated copies of the same story under different URLs
+        results, saved = suppress_near_duplicates(
+            results, text=lambda r: f"{r.title} {r.snippet}", kind="web_results", limit=limit
+        )
+
+    update: Dict[str, Any] = {"web_results": results[:limit], "near_dup_bytes_saved": saved}
+    if any(r is None for r in per_query):
+        update["partial_sources"] = ["web_search"]
+    return update
+
+
+def _merge_doc_chunks(per_query: List[List[Any] | None], limit: int) -> Dict[str, Any]:
+    """
+    State update from per-sub-query doc chunks (None: the search missed the deadline),
+    cut back to the request's limit.
+    """
+    chunks = _interleave_unique([c for c in per_query if c], key=lambda c: c.chunk_id or f"{c.doc_id}#{c.page}")
+    with timed_tool("dedup", "minhash", items=len(chunks)):
+        # Overlapping chunks, and the same page in different copies of a report
+        chunks, saved = suppress_near_duplicates(chunks, text=lambda c: c.text, kind="doc_chunks", limit=limit)
+
+    update: Dict[str, Any] = {"doc_chunks": chunks[:limit], "near_dup_bytes_saved": saved}
+    if any(c is None for c in per_query):
+        update["partial_sources"] = ["doc_search"]
+    return update
+
+
+@_timed("web_search")
 def node_web_search(state: ResearchState) -> Dict[str, Any]:
-    results = web_search(state.query, max_results=5)
-    return {"web_results": results}
+    # Sub-queries run concurrently, so this costs about as much as the slowest single search.
+    # If Tavily stalls past the budget, the draft goes ahead without the missing results.
+    per_query = web_search_many(
+        expand_queries(state),
+        max_results=state.max_web_results,
+        use_cache=not state.bypass_cache,
+        timeout=_remaining_budget(state),
+    )
+    return _merge_web_results(per_query, limit=state.max_web_results)
 
 
+@_timed("doc_search")
 def node_doc_search(state: ResearchState) -> Dict[str, Any]:
-    chunks = query_docs(state.query, n_results=10)
-    return {"doc_chunks": chunks}
+    # Embedding + Chroma share the retrieval budget with web search
+    per_query = query_docs_many(
+        expand_queries(state),
+        n_results=state.max_doc_chunks,
+        timeout=_remaining_budget(state),
+    )
+    return _merge_doc_chunks(per_query, limit=state.max_doc_chunks)
+
+
+@_timed("synthesis")
+def node_synthesis(state: ResearchState) -> Dict[str, Any]:
+    if not settings.llm_synthesis_enabled:
+        return {}
+    evidence = pack_evidence(state.web_results, state.doc_chunks)
+    if not evidence:
+        return {}
 
+    # Stop generating in time to render the report before the deadline
+    deadline = None if state.deadline is None else state.deadline - settings.deadline_reserve_seconds
+    if deadline is not None and time.time() >= deadline:
+        return {"partial_sources": ["synthesis"]}
 
+    # Tokens go out on the "custom" stream as they arrive (a no-op under invoke())
+    writer = get_stream_writer()
+    try:
+        text, complete = stream_synthesis(
+            get_llm(),
+            build_messages(state, evidence),
+            on_token=lambda token: writer({"token": token}),
+            deadline=deadline,
+        )
+    except Exception as e:
+        # The template sections still render; the draft is just marked partial. The
+        # failure shows on the node.synthesis span and as gemini/stream outcome="error".
+        record_exception(e)
+        return {"partial_sources": ["synthesis"]}
+
+    update: Dict[str, Any] = {"synthesis": parse_sections(text)}
+    if not complete:
+        update["partial_sources"] = ["synthesis"]
+    return update
+
+
+@_timed("report_generation")
 def node_report_generation(state: ResearchState) -> Dict[str, Any]:
     updated_state = generate_draft_report(state)
+
+    RESULT_SIZE.labels(kind="web_results").set(len(updated_state.web_results))
+    RESULT_SIZE.labels(kind="doc_chunks").set(len(updated_state.doc_chunks))
+    RESULT_SIZE.labels(kind="markdown_bytes").set(len((updated_state.draft_markdown or "").encode("utf-8")))
+    NEAR_DUP_BYTES_SAVED.observe(updated_state.near_dup_bytes_saved)
     return {
         "draft_markdown": updated_state.draft_markdown,
         "citations": updated_state.citations,
@@ -38,26 +225,52 @@ _graph_builder = StateGraph(ResearchState)
 
 _graph_builder.add_node("web_search", node_web_search)
 _graph_builder.add_node("doc_search", node_doc_search)
+_graph_builder.add_node("synthesis", node_synthesis)
 _graph_builder.add_node("report_generation", node_report_generation)
 
-_graph_builder.add_edge(START, "web_search")
-# Parallel-ish pattern: web_search → doc_search → report_generation
-_graph_builder.add_edge("web_search", "doc_search")
-_graph_builder.add_edge("doc_search", "report_generation")
+if settings.graph_parallel_retrieval:
+    # Fan-out: both retrieval nodes start from START and run in the same superstep.
+    # Fan-in: synthesis waits for both; list results merge via state reducers.
+    _graph_builder.add_edge(START, "web_search")
+    _graph_builder.add_edge(START, "doc_search")
+    _graph_builder.add_edge(["web_search", "doc_search"], "synthesis")
+else:
+    # Sequential pattern: web_search → doc_search → synthesis
+    _graph_builder.add_edge(START, "web_search")
+    _graph_builder.add_edge("web_search", "doc_search")
+    _graph_builder.add_edge("doc_search", "synthesis")
+_graph_builder.add_edge("synthesis", "report_generation")
 _graph_builder.add_edge("report_generation", END)
 
 agent_app = _graph_builder.compile()
 
+# Batch runs retrieve for every item up front (run_research_batch), then finish
+# each item with just the post-retrieval part of the graph
+_post_retrieval_builder = StateGraph(ResearchState)
+_post_retrieval_builder.add_node("synthesis", node_synthesis)
+_post_retrieval_builder.add_node("report_generation", node_report_generation)
+_post_retrieval_builder.add_edge(START, "synthesis")
+_post_retrieval_builder.add_edge("synthesis", "report_generation")
+_post_retrieval_builder.add_edge("report_generation", END)
 
-def run_research(req: ResearchRequest) -> ResearchState:
-    initial_state = ResearchState(
+post_retrieval_app = _post_retrieval_builder.compile()
+
+
+def _initial_state(req: ResearchRequest) -> ResearchState:
+    budget = req.deadline_seconds or settings.research_deadline_seconds
+    return ResearchState(
         query=req.query,
         industry=req.industry,
         competitors=req.competitors or [],
+        max_web_results=req.max_web_results,
+        max_doc_chunks=req.max_doc_chunks,
+        bypass_cache=req.bypass_cache,
+        deadline=time.time() + budget,
+        deadline_seconds=budget,
     )
 
-    raw_state = agent_app.invoke(initial_state)
 
+def _to_state(raw_state: Any) -> ResearchState:
     # LangGraph may return a dict instead of a ResearchState instance
     if isinstance(raw_state, dict):
         # Defensive: ensure citations are plain strings
@@ -67,3 +280,278 @@ def run_research(req: ResearchRequest) -> ResearchState:
 
     # If it’s already a ResearchState, just return it
     return raw_state
+
+
+RESEARCH_COALESCED_COUNTER = Counter(
+    "research_requests_coalesced_total",
+    "Research requests served without running the graph themselves",
+    # inflight: joined an identical running request; cache: recent result;
+    # semantic: stored answer to a paraphrase of the query
+    ["source"],
+)
+
+# Identical concurrent requests share one graph execution; follow-ups within
+# the TTL are answered from the short-lived result cache.
+_single_flight = SingleFlight()
+_result_cache = TTLCache(
+    max_entries=settings.research_result_cache_size,
+    ttl_seconds=settings.research_result_cache_ttl_seconds,
+)
+_semantic_cache = SemanticCache(
+    threshold=settings.semantic_cache_threshold,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+    max_entries=settings.semantic_cache_max_entries,
+)
+
+
+def _request_key(req: ResearchRequest) -> str:
+    return make_key(
+        normalize_text(req.query),
+        normalize_text(req.industry or ""),
+        sorted(normalize_text(c) for c in req.competitors or [] if c.strip()),
+        req.max_web_results,
+        req.max_doc_chunks,
+    )
+
+
+def _flight_key(req: ResearchRequest) -> str:
+    # Followers get the leader's result, deadline included, so only requests with the
+    # same budget coalesce; the result cache still keys on _request_key alone
+    return make_key(_request_key(req), req.deadline_seconds or settings.research_deadline_seconds)
+
+
+def _execute_graph(req: ResearchRequest) -> ResearchState:
+    start = time.perf_counter()
+    with span("research", query=req.query):
+        state = _to_state(agent_app.invoke(_initial_state(req)))
+    total = time.perf_counter() - start
+
+    # With parallel retrieval, total should track max(web_search, doc_search), not their sum
+    state.timings = {**state.timings, "total": total}
+    return state
+
+
+def _answer(req: ResearchRequest, admit: Callable[[], ContextManager[Any]]) -> ResearchState:
+    """Serve a paraphrase's stored answer if there is one, otherwise run the graph."""
+    if settings.semantic_cache_enabled:
+        cached = _semantic_cache.get(req)
+        if cached is not None:
+            RESEARCH_COALESCED_COUNTER.labels(source="semantic").inc()
+            # Re-render so the report heads with the caller's query and notes the reuse
+            return generate_draft_report(cached)
+
+    with admit():
+        state = _execute_graph(req)
+    if settings.semantic_cache_enabled and not state.partial_sources:
+        _semantic_cache.set(req, state)
+    return state
+
+
+def run_research(
+    req: ResearchRequest, admit: Callable[[], ContextManager[Any]] = nullcontext
+) -> ResearchState:
+    """
+    Research one request. admit() is entered around the graph execution only (e.g. an
+    admission slot): cache hits and requests joining an identical one in flight don't take it.
+    """
+    if req.bypass_cache:
+        with admit():
+            return _execute_graph(req)
+
+    key = _request_key(req)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        RESEARCH_COALESCED_COUNTER.labels(source="cache").inc()
+        return cached.model_copy(deep=True)
+
+    state, shared = _single_flight.do(_flight_key(req), lambda: _answer(req, admit))
+    if shared:
+        RESEARCH_COALESCED_COUNTER.labels(source="inflight").inc()
+    elif not state.partial_sources:
+        # Partial drafts are not cached; the next request retries the missing sources
+        _result_cache.set(key, state)
+    # Callers get their own copy so nobody mutates the shared state
+    return state.model_copy(deep=True)
+
+
+def stream_research(req: ResearchRequest) -> Iterator[Tuple[str, Any]]:
+    """
+    Run the graph and yield (node_name, update) as each node finishes, ("token", {"token": ...})
+    for each synthesis token as it is generated, then ("__end__", final ResearchState).
+    """
+    start = time.perf_counter()
+    final_values: Any = None
+
+    with span("research.stream", query=req.query):
+        for mode, chunk in agent_app.stream(_initial_state(req), stream_mode=["updates", "values", "custom"]):
+            if mode == "values":
+                final_values = chunk
+                continue
+            if mode == "custom":
+                yield "token", chunk
+                continue
+            for node_name, update in chunk.items():
+                yield node_name, update
+
+    state = _to_state(final_values)
+    state.timings = {**state.timings, "total": time.perf_counter() - start}
+    yield "__end__", state
+
+
+def _start_batch_retrieval(states: List[ResearchState]) -> Callable[[ResearchState], None]:
+    """
+    Start retrieval for a whole batch and return collect(state), which waits for that
+    item's share and writes it into the state. Identical sub-queries are searched once
+    (in the first spelling seen; the normalized form is only the de-dup key), all doc
+    sub-queries share one embedding batch and one Chroma query, and web searches run
+    concurrently under the shared Tavily limit. collect() waits only as long as the
+    item's own deadline allows; whatever is still outstanding then is dropped for it.
+    """
+    spelling: Dict[str, str] = {}
+    bypass: Dict[str, bool] = {}
+    budget: Dict[str, float | None] = {}
+    for state in states:
+        item_budget = _remaining_budget(state)
+        for q in expand_queries(state):
+            key = normalize_text(q)
+            spelling.setdefault(key, q)
+            # Only sub-queries of bypassing items skip the caches; a fresh result suits everyone
+            bypass[key] = bypass.get(key, False) or state.bypass_cache
+            # The live call may run as long as the most patient item using it
+            previous = budget.get(key, 0.0)
+            budget[key] = None if item_budget is None or previous is None else max(previous, item_budget)
+    keys = list(spelling)
+
+    started = time.perf_counter()
+    done_at: Dict[str, float] = {}
+    docs_future = submit_doc_search(
+        [spelling[k] for k in keys], n_results=max(s.max_doc_chunks for s in states)
+    )
+    docs_future.add_done_callback(lambda _: done_at.setdefault("doc_search", time.perf_counter()))
+    web_futures = {
+        k: submit_web_search(
+            spelling[k],
+            max_results=max(s.max_web_results for s in states),
+            use_cache=not bypass[k],
+            timeout=budget[k],
+        )
+        for k in keys
+    }
+
+    def collect(state: ResearchState) -> None:
+        sub_queries = list(dict.fromkeys(normalize_text(q) for q in expand_queries(state)))
+        web = collect_web_searches(
+            [spelling[k] for k in sub_queries],
+            [web_futures[k] for k in sub_queries],
+            timeout=_remaining_budget(state),
+        )
+        web_elapsed = time.perf_counter() - started
+
+        remaining = _remaining_budget(state)
+        try:
+            # A failed doc search raises here and fails the item, as it would a single request
+            docs = dict(zip(keys, docs_future.result(timeout=None if remaining is None else max(remaining, 0.0))))
+            per_query_docs = [docs[k][:state.max_doc_chunks] for k in sub_queries]
+        except FutureTimeoutError:
+            print(f"Doc search timed out for batch item: {state.query!r}")
+            per_query_docs = [None for _ in sub_queries]
+
+        web_update = _merge_web_results(
+            [None if r is None else r[:state.max_web_results] for r in web],
+            limit=state.max_web_results,
+        )
+        doc_update = _merge_doc_chunks(per_query_docs, limit=state.max_doc_chunks)
+        state.web_results = web_update["web_results"]
+        state.doc_chunks = doc_update["doc_chunks"]
+        state.partial_sources = web_update.get("partial_sources", []) + doc_update.get("partial_sources", [])
+        state.near_dup_bytes_saved = web_update["near_dup_bytes_saved"] + doc_update["near_dup_bytes_saved"]
+        state.timings = {
+            "web_search": web_elapsed,
+            "doc_search": done_at.get("doc_search", time.perf_counter()) - started,
+        }
+
+    return collect
+
+
+def _finish_batch_item(
+    state: ResearchState, collect: Callable[[ResearchState], None], started: float
+) -> ResearchState:
+    with span("research.batch_item", query=state.query):
+        collect(state)
+        result = _to_state(post_retrieval_app.invoke(state))
+    result.timings = {**result.timings, "total": time.perf_counter() - started}
+    return result
+
+
+def run_research_batch(reqs: List[ResearchRequest]) -> Iterator[Tuple[int, ResearchState | Exception]]:
+    """
+    Research a batch of requests with shared retrieval; yields (index, state or exception)
+    for every item, in completion order.
+
+    Items go through the same result and semantic caches as run_research, and identical
+    items within the batch run once. They are not coalesced with single requests in
+    flight elsewhere: retrieval is shared across the batch, so there is no per-item
+    execution to join or to let others join.
+    """
+    started = time.perf_counter()
+    pending: Dict[int, ResearchState] = {}
+    keys: Dict[int, str] = {}
+    leaders: Dict[str, int] = {}
+    followers: Dict[int, List[int]] = {}  # leader index -> identical items sharing its run
+
+    for i, req in enumerate(reqs):
+        keys[i] = _request_key(req)
+        if not req.bypass_cache:
+            cached = _result_cache.get(keys[i])
+            if cached is not None:
+                RESEARCH_COALESCED_COUNTER.labels(source="cache").inc()
+                yield i, cached.model_copy(deep=True)
+                continue
+            if settings.semantic_cache_enabled:
+                hit = _semantic_cache.get(req)
+                if hit is not None:
+                    RESEARCH_COALESCED_COUNTER.labels(source="semantic").inc()
+                    yield i, generate_draft_report(hit)
+                    continue
+            flight_key = _flight_key(req)
+            if flight_key in leaders:
+                RESEARCH_COALESCED_COUNTER.labels(source="inflight").inc()
+                followers[leaders[flight_key]].append(i)
+                continue
+            leaders[flight_key] = i
+        followers[i] = []
+        pending[i] = _initial_state(req)
+    if not pending:
+        return
+
+    try:
+        with span("research.batch", items=len(pending)):
+            collect = _start_batch_retrieval(list(pending.values()))
+    except Exception as e:
+        # Shared retrieval couldn't start: every item still waiting gets its own error line
+        for i in pending:
+            for j in [i, *followers[i]]:
+                yield j, e
+        return
+
+    # Each item collects its share and finishes on its own, so a slow search or a
+    # generous deadline elsewhere in the batch never holds it back
+    with ThreadPoolExecutor(max_workers=settings.batch_max_concurrency, thread_name_prefix="research-batch") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _finish_batch_item, state, collect, started): i
+            for i, state in pending.items()
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                state = future.result()
+            except Exception as e:
+                for j in [i, *followers[i]]:
+                    yield j, e
+                continue
+            if not state.partial_sources:
+                _result_cache.set(keys[i], state)
+                if settings.semantic_cache_enabled and not reqs[i].bypass_cache:
+                    _semantic_cache.set(reqs[i], state)
+            for j in [i, *followers[i]]:
+                yield j, state.model_copy(deep=True)
@@ -0,0 +1,155 @@
+# app/agent/semantic_cache.py
+# Answer cache keyed by query embedding similarity.
+# "EV battery market size 2025" and "2025 electric vehicle battery market size" miss
+# the exact-match result cache but land close together in embedding space. Finished
+# ResearchStates are stored in a small Chroma collection next to the document index;
+# a lookup returns the nearest one if it is similar enough and has the same scope
+# (industry, competitors, result limits).
+import threading
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.cache import make_key, normalize_text
+from app.models import ResearchRequest, ResearchState
+from app.tools import doc_store
+from app.tools.embeddings import embedding_model_id
+
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "research_semantic_cache_lookups_total",
+    "Semantic answer cache lookups",
+    ["result"],  # hit / miss / expired / error
+)
+
+SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "research_semantic_cache_similarity",
+    "Cosine similarity of the nearest cached query in scope",
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.88, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0),
+)
+
+
+def request_scope(req: ResearchRequest) -> str:
+    """Everything besides the query text that must match for an answer to be reusable."""
+    return make_key(
+        normalize_text(req.industry or ""),
+        sorted(normalize_text(c) for c in req.competitors or [] if c.strip()),
+        req.max_web_results,
+        req.max_doc_chunks,
+    )
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of ResearchStates in a dedicated Chroma collection."""
+
+    def __init__(
+        self,
+        threshold: float,
+        ttl_seconds: float,
+        max_entries: int,
+        collection_name: str = "research_answer_cache",
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.collection_name = collection_name
+        # Once full, evict this many extra entries so the oldest-first scan runs
+        # about once per evict_batch stores rather than on every store
+        self.evict_batch = max(1, max_entries // 10)
+        self._collection = None
+        self._lock = threading.Lock()
+
+    def _get_collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    # Embeddings are always passed explicitly, so no embedding function is attached
+                    self._collection = doc_store.get_chroma_client().get_or_create_collection(
+                        name=self.collection_name,
+                        metadata={"hnsw:space": "cosine"},
+                        embedding_function=None,
+                    )
+        return self._collection
+
+    def _where(self, req: ResearchRequest) -> dict:
+        # The model id keeps vectors from a different embedding space from ever matching
+        return {"$and": [{"scope": request_scope(req)}, {"model": embedding_model_id}]}
+
+    def get(self, req: ResearchRequest) -> Optional[ResearchState]:
+        """
+        The stored state for the nearest in-scope paraphrase, or None. The hit is
+        rebound to req.query; semantic_cache_query keeps the paraphrase it was stored for.
+        """
+        try:
+            res = self._get_collection().query(
+                query_embeddings=[doc_store.embed_query(req.query)],
+                n_results=1,
+                where=self._where(req),
+                include=["documents", "metadatas", "distances"],
+            )
+        except Exception as e:
+            # A broken cache must never fail the request; fall through to the graph
+            print("Semantic cache lookup failed:", e)
+            SEMANTIC_CACHE_LOOKUPS.labels(result="error").inc()
+            return None
+
+        ids = res.get("ids", [[]])[0]
+        if not ids:
+            SEMANTIC_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        meta = res["metadatas"][0][0]
+        similarity = min(1.0, 1.0 - float(res["distances"][0][0]))
+        SEMANTIC_CACHE_SIMILARITY.observe(similarity)
+
+        if time.time() - float(meta["created_at"]) > self.ttl_seconds:
+            self._get_collection().delete(ids=[ids[0]])
+            SEMANTIC_CACHE_LOOKUPS.labels(result="expired").inc()
+            return None
+
+        if similarity < self.threshold:
+            SEMANTIC_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        SEMANTIC_CACHE_LOOKUPS.labels(result="hit").inc()
+        state = ResearchState.model_validate_json(res["documents"][0][0])
+        if normalize_text(state.query) != normalize_text(req.query):
+            state.semantic_cache_query = state.query
+        state.query = req.query
+        return state
+
+    def set(self, req: ResearchRequest, state: ResearchState) -> None:
+        scope = request_scope(req)
+        text = normalize_text(req.query)
+        try:
+            collection = self._get_collection()
+            collection.upsert(
+                ids=[make_key(scope, embedding_model_id, text)],
+                embeddings=[doc_store.embed_query(req.query)],
+                documents=[state.model_dump_json()],
+                metadatas=[{
+                    "scope": scope,
+                    "model": embedding_model_id,
+                    "query": text,
+                    "created_at": time.time(),
+                }],
+            )
+            self._evict(collection)
+        except Exception as e:
+            print("Semantic cache store failed:", e)
+
+    def _evict(self, collection) -> None:
+        if collection.count() <= self.max_entries:
+            return
+
+        # Over capacity: TTL sweep, then drop the oldest entries plus a batch of headroom
+        collection.delete(where={"created_at": {"$lt": time.time() - self.ttl_seconds}})
+        overflow = collection.count() - self.max_entries
+        if overflow > 0:
+            entries = collection.get(include=["metadatas"])
+            oldest = sorted(
+                zip(entries["ids"], entries["metadatas"]),
+                key=lambda item: item[1]["created_at"],
+            )[:overflow + self.evict_batch]
+            collection.delete(ids=[entry_id for entry_id, _ in oldest])
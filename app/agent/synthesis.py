@@ -0,0 +1,206 @@
+# app/agent/synthesis.py
+# LLM synthesis of the report's narrative sections (overview, competitive landscape,
+# recommendations) from retrieved evidence.
+# Evidence is packed greedily by relevance into a fixed token budget, skipping
+# near-duplicates and capping items per source, so prompt size (and therefore LLM
+# latency and cost) stays flat however many results retrieval lets through.
+import contextvars
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.config import settings
+from app.models import DocumentChunk, ResearchState, WebSearchResult
+from app.telemetry import LLM_LATENCY_HISTOGRAM, timed_tool
+from app.tools.near_dup import shingles as text_shingles
+
+
+SECTIONS = {
+    "overview": "Overview",
+    "competition": "Competitive Landscape",
+    "recommendations": "Recommendations",
+}
+
+
+@dataclass
+class Evidence:
+    label: str  # [W1] / [D3], the tag the model cites
+    source: str  # domain or document, for per-source caps
+    title: str
+    text: str
+    score: float
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    # Gemini counts are only available via an API call; ~4 characters per token is close enough
+    return len(text) // 4 + 1
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _candidates(web_results: List[WebSearchResult], doc_chunks: List[DocumentChunk]) -> List[Evidence]:
+    """Score each item by reciprocal rank within its own list, as in RRF, so both kinds interleave."""
+    max_chars = settings.llm_max_item_tokens * 4
+    items: List[Evidence] = []
+    for rank, r in enumerate(web_results, start=1):
+        items.append(Evidence(
+            label=f"W{rank}",
+            source=urlparse(r.url).netloc or r.url,
+            title=f"{r.title} ({r.url})",
+            text=r.snippet[:max_chars],
+            score=1.0 / (settings.rrf_k + rank),
+            tokens=0,
+        ))
+    for rank, c in enumerate(doc_chunks, start=1):
+        items.append(Evidence(
+            label=f"D{rank}",
+            source=c.source,
+            title=f"{c.source}, page {c.page}",
+            text=c.text[:max_chars],
+            score=1.0 / (settings.rrf_k + rank),
+            tokens=0,
+        ))
+    for item in items:
+        item.tokens = estimate_tokens(f"[{item.label}] {item.title}\n{item.text}")
+    return items
+
+
+def pack_evidence(
+    web_results: List[WebSearchResult],
+    doc_chunks: List[DocumentChunk],
+    budget_tokens: Optional[int] = None,
+    per_source_cap: Optional[int] = None,
+    dedup_threshold: Optional[float] = None,
+) -> List[Evidence]:
+    """Greedy by score: take each item that fits the budget, isn't a near-duplicate and whose source has room."""
+    budget = settings.llm_context_budget_tokens if budget_tokens is None else budget_tokens
+    cap = settings.llm_max_items_per_source if per_source_cap is None else per_source_cap
+    threshold = settings.llm_dedup_threshold if dedup_threshold is None else dedup_threshold
+
+    packed: List[Evidence] = []
+    packed_shingles: List[set] = []
+    per_source: Dict[str, int] = {}
+    used = 0
+
+    for item in sorted(_candidates(web_results, doc_chunks), key=lambda e: e.score, reverse=True):
+        if used + item.tokens > budget or per_source.get(item.source, 0) >= cap:
+            continue
+        shingles = text_shingles(item.text)
+        if any(_jaccard(shingles, other) >= threshold for other in packed_shingles):
+            continue
+        packed.append(item)
+        packed_shingles.append(shingles)
+        per_source[item.source] = per_source.get(item.source, 0) + 1
+        used += item.tokens
+
+    return packed
+
+
+def build_messages(state: ResearchState, evidence: List[Evidence]) -> List[Tuple[str, str]]:
+    headings = "\n".join(f"### {title}" for title in SECTIONS.values())
+    system = (
+        "You are a market research analyst. Use only the numbered evidence provided. "
+        "Cite evidence inline by its tag, e.g. [W2] or [D1]. If the evidence does not "
+        "cover something, say so instead of guessing. Answer in Markdown with exactly "
+        f"these three headings, in this order:\n{headings}"
+    )
+    context = "\n\n".join(f"[{e.label}] {e.title}\n{e.text}" for e in evidence)
+    user = (
+        f"Research question: {state.query}\n"
+        f"Industry: {state.industry or 'Not specified'}\n"
+        f"Competitors: {', '.join(state.competitors or []) or 'Not specified'}\n\n"
+        f"Evidence:\n{context}"
+    )
+    return [("system", system), ("human", user)]
+
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """Split the model output on the expected ### headings; unlabelled text goes to recommendations."""
+    keys = {title.lower(): key for key, title in SECTIONS.items()}
+    sections: Dict[str, List[str]] = {}
+    current = "recommendations"
+    for line in text.splitlines():
+        match = re.match(r"^#{1,4}\s*(.+?)\s*$", line)
+        if match and match.group(1).lower() in keys:
+            current = keys[match.group(1).lower()]
+            continue
+        sections.setdefault(current, []).append(line)
+    return {key: "\n".join(lines).strip() for key, lines in sections.items() if "\n".join(lines).strip()}
+
+
+def _token_text(chunk) -> str:
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in chunk.content)
+
+
+_DONE = object()
+
+
+def stream_synthesis(
+    llm,
+    messages: List[Tuple[str, str]],
+    on_token: Callable[[str], None],
+    deadline: Optional[float] = None,
+) -> Tuple[str, bool]:
+    """
+    Stream the completion, passing each token to on_token.
+    Returns (text, complete); complete is False if the deadline cut the stream short.
+    """
+    # The client blocks (and retries) inside stream(), so it runs on its own thread and
+    # tokens are read here with a timeout: a stalled call can't hold the draft past the deadline.
+    tokens: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+
+    def produce() -> None:
+        stream = None
+        try:
+            stream = llm.stream(messages)
+            for chunk in stream:
+                # Once the reader has given up, close the stream instead of paying for the rest
+                if stop.is_set():
+                    break
+                tokens.put(_token_text(chunk))
+            tokens.put(_DONE)
+        except BaseException as e:
+            tokens.put(e)
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+
+    parts: List[str] = []
+    complete = True
+    start = time.perf_counter()
+    try:
+        with timed_tool("gemini", "stream", prompt_messages=len(messages)):
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(produce,), name="llm-stream", daemon=True
+            ).start()
+            while True:
+                try:
+                    timeout = None if deadline is None else max(0.0, deadline - time.time())
+                    item = tokens.get(timeout=timeout)
+                except queue.Empty:
+                    # The producer stops at its next chunk. A call still waiting for its first
+                    # chunk can't be interrupted: it ends within llm_timeout_seconds per attempt,
+                    # up to llm_max_retries + 1 attempts.
+                    complete = False
+                    break
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                if item:
+                    parts.append(item)
+                    on_token(item)
+    finally:
+        stop.set()
+        LLM_LATENCY_HISTOGRAM.observe(time.perf_counter() - start)
+    return "".join(parts), complete
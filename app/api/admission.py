@@ -0,0 +1,102 @@
+# app/api/admission.py
+# Admission control for synchronous research endpoints: at most max_concurrent graph
+# executions, a bounded FIFO wait queue, and a cap on how long a caller may wait.
+# Callers over the limits are turned away fast (429 / 503 + Retry-After) instead of
+# piling up threads, embedding CPU and Tavily calls behind each other.
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+RESEARCH_IN_FLIGHT = Gauge(
+    "research_requests_in_flight",
+    "Research graph executions currently admitted",
+)
+
+RESEARCH_QUEUED = Gauge(
+    "research_requests_queued",
+    "Research requests waiting for an execution slot",
+)
+
+ADMISSION_WAIT = Histogram(
+    "research_admission_wait_seconds",
+    "Time an admitted request waited for an execution slot",
+)
+
+ADMISSION_REJECTED = Counter(
+    "research_admission_rejected_total",
+    "Research requests turned away by admission control",
+    ["reason"],  # queue_full / queue_timeout
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; the API maps this to status + Retry-After."""
+
+    def __init__(self, reason: str, status: int, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int, max_queue_seconds: float, retry_after_seconds: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_seconds = max_queue_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._in_flight = 0
+        self._waiters: deque = deque()  # FIFO of threading.Event, one per queued request
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take an execution slot, waiting in line if needed, or raise AdmissionRejected."""
+        with self._lock:
+            if self._in_flight < self.max_concurrent and not self._waiters:
+                self._admit()
+                ADMISSION_WAIT.observe(0.0)
+                return
+            if len(self._waiters) >= self.max_queue:
+                ADMISSION_REJECTED.labels(reason="queue_full").inc()
+                raise AdmissionRejected("queue_full", 429, self.retry_after_seconds)
+            ready = threading.Event()
+            self._waiters.append(ready)
+            RESEARCH_QUEUED.set(len(self._waiters))
+
+        started = time.perf_counter()
+        admitted = ready.wait(self.max_queue_seconds)
+        with self._lock:
+            # release() may have handed us the slot just as the wait timed out
+            if not admitted and not ready.is_set():
+                self._waiters.remove(ready)
+                RESEARCH_QUEUED.set(len(self._waiters))
+                ADMISSION_REJECTED.labels(reason="queue_timeout").inc()
+                raise AdmissionRejected("queue_timeout", 503, self.retry_after_seconds)
+        ADMISSION_WAIT.observe(time.perf_counter() - started)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter; in-flight count is unchanged
+                self._waiters.popleft().set()
+                RESEARCH_QUEUED.set(len(self._waiters))
+            else:
+                self._in_flight -= 1
+                RESEARCH_IN_FLIGHT.set(self._in_flight)
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        RESEARCH_IN_FLIGHT.set(self._in_flight)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,67 @@
+# app/api/drafts.py
+# Draft repository: lets /finalize reattach query + citations by draft id without re-running the graph.
+import threading
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.cache import SQLiteCache, TTLCache
+from app.models import DraftReport
+
+
+DRAFT_STORE_LOOKUPS = Counter(
+    "draft_store_lookups_total",
+    "Draft lookups by result (memory hit, disk hit, miss)",
+    ["result"],
+)
+
+DRAFT_STORE_SIZE = Gauge(
+    "draft_store_size",
+    "Unexpired drafts in the persistent draft store",
+)
+
+
+class DraftRepository:
+    """
+    In-memory LRU in front of a SQLite file; both tiers expire entries after ttl_seconds.
+    The size gauge is recounted at most every size_refresh_seconds, so a burst of saves
+    (e.g. a large batch) doesn't run a COUNT(*) per draft.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_cached: int, size_refresh_seconds: float = 30.0):
+        self._memory = TTLCache(max_entries=max_cached, ttl_seconds=ttl_seconds)
+        self._disk = SQLiteCache(path, ttl_seconds=ttl_seconds, table="drafts")
+        self._size_refresh_seconds = size_refresh_seconds
+        self._size_counted_at = float("-inf")
+        self._size_lock = threading.Lock()
+        self._refresh_size()
+
+    def _refresh_size(self) -> None:
+        now = time.monotonic()
+        with self._size_lock:
+            if now - self._size_counted_at < self._size_refresh_seconds:
+                return
+            self._size_counted_at = now
+        DRAFT_STORE_SIZE.set(self._disk.count())
+
+    def save(self, draft: DraftReport) -> None:
+        self._memory.set(draft.id, draft)
+        self._disk.set(draft.id, draft.model_dump(mode="json"))
+        self._refresh_size()
+
+    def get(self, draft_id: str) -> Optional[DraftReport]:
+        draft = self._memory.get(draft_id)
+        if draft is not None:
+            DRAFT_STORE_LOOKUPS.labels(result="memory").inc()
+            return draft
+
+        data = self._disk.get(draft_id)
+        if data is None:
+            DRAFT_STORE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        DRAFT_STORE_LOOKUPS.labels(result="disk").inc()
+        draft = DraftReport.model_validate(data)
+        self._memory.set(draft_id, draft)
+        return draft
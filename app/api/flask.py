@@ -1,23 +1,42 @@
 # This exposes endpoints:
 
 # 1. POST /api/research/draft – generate draft report
-# 2. POST /api/research/finalize – apply Gradio feedback and produce final report
-# 3. GET /metrics – Prometheus endpoint
-
+#    (?fields=id,draft_markdown to project fields, ?chunks=ref for doc chunks without text)
+# 2. POST /api/research/draft/stream – same as 1 but streams node progress as server-sent events
+# 3. POST /api/research/draft/batch – many requests with shared retrieval, results as NDJSON lines
+# 4. POST /api/research/jobs – queue a draft in the background, returns a job id
+# 5. GET /api/research/jobs/<id> – job status and the draft once done (same ?fields= / ?chunks= options)
+# 6. POST /api/research/finalize – apply Gradio feedback and produce final report
+# 7. GET /metrics – Prometheus endpoint
+# 8. GET /healthz – liveness; GET /readyz – readiness (which components are warm)
+
+import gzip
+import json
+import threading
 from uuid import uuid4
-from typing import Callable, Type, Tuple
+from typing import Any, Callable, Type, Tuple
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from pydantic import BaseModel, ValidationError
+from pydantic_core import to_jsonable_python
 
 from prometheus_flask_exporter import PrometheusMetrics
-from prometheus_client import Counter,Histogram
+from prometheus_client import Counter
 
 from app.config import settings
-from app.models import ResearchRequest, DraftReport, ReportFeedback, FinalReport
-from app.agent.graph import run_research, llm
+from app.models import ResearchRequest, ResearchState, DraftReport, ReportFeedback, FinalReport
+from app.agent.graph import run_research, run_research_batch, stream_research, get_llm
+import app.agent.graph as graph
+from app.api.admission import AdmissionController, AdmissionRejected
+from app.api.drafts import DraftRepository
+from app.api.jobs import JobManager, QueueFullError
+from app.tools import doc_store, web_search
 from app.tools.doc_store import sync_local_docs
-import os
+
+try:
+    import brotli
+except ImportError:  # optional: responses fall back to gzip
+    brotli = None
 
 app = Flask(__name__)
 metrics = PrometheusMetrics(app, path="/metrics",group_by="endpoint")
@@ -37,22 +56,78 @@ REQUEST_FINALIZE_COUNTER = Counter(
     "Number of finalize requests"
 )
 
-LLM_LATENCY_HISTOGRAM = Histogram(
-    "llm_finalize_latency_seconds",
-    "Time spent in LLM finalize step"
+job_manager = JobManager(
+    workers=settings.job_workers,
+    max_queue=settings.job_max_queue,
+    retention_seconds=settings.job_retention_seconds,
+    max_retained=settings.job_max_retained,
 )
 
+
+admission = AdmissionController(
+    max_concurrent=settings.admission_max_concurrent,
+    max_queue=settings.admission_max_queue,
+    max_queue_seconds=settings.admission_max_queue_seconds,
+    retry_after_seconds=settings.admission_retry_after_seconds,
+)
+
+
+draft_repository = DraftRepository(
+    path=settings.draft_store_path,
+    ttl_seconds=settings.draft_ttl_seconds,
+    max_cached=settings.draft_cache_max_entries,
+    size_refresh_seconds=settings.draft_store_size_refresh_seconds,
+)
+
+
+_index_ready = threading.Event()
+_warmup_error: str | None = None
+
+
 def initialize_document_index():
+    # Incremental sync: unchanged files are skipped via the manifest,
+    # so this is near-instant when the corpus has not changed.
+    print("Syncing document index from:", DOCUMENT_FOLDER)
+    stats = sync_local_docs(DOCUMENT_FOLDER)
+    print("Document index synced:", stats)
+    _index_ready.set()
+
+
+def warm_up():
+    """Sync the index and build every heavy client so the first request doesn't pay for it."""
+    global _warmup_error
+    try:
+        initialize_document_index()
+        doc_store.warm_up()
+        web_search._get_tavily_client()
+        get_llm()
+    except Exception as e:
+        _warmup_error = f"{type(e).__name__}: {e}"
+        print("Warm-up failed:", _warmup_error)
+        raise
+
+
+def build_draft(state: ResearchState, draft_id: str | None = None) -> DraftReport:
+    """Turn a finished ResearchState into a DraftReport and persist it for /finalize."""
+    draft = DraftReport(
+        id=draft_id or str(uuid4()),
+        query=state.query,
+        draft_markdown=state.draft_markdown or "",
+        web_results=state.web_results,
+        doc_chunks=state.doc_chunks,
+        citations=state.citations,
+        timings=state.timings,
+        partial=bool(state.partial_sources),
+        partial_sources=state.partial_sources,
+        semantic_cache_query=state.semantic_cache_query,
+    )
+    draft_repository.save(draft)
+    return draft
 
-    # Index exists → skip
-    if os.path.exists("./chroma_db") and len(os.listdir("./chroma_db")) > 0:
-        print("Chroma index detected. Skipping indexing...")
-        return
-    
-    # If no index, build it once
-    print("No index found. Indexing documents from:", DOCUMENT_FOLDER)
-    sync_local_docs(DOCUMENT_FOLDER)
-    print("Index created successfully.")
+
+def run_draft_job(req: ResearchRequest, draft_id: str) -> DraftReport:
+    """Worker-side body of a queued draft job."""
+    return build_draft(run_research(req), draft_id=draft_id)
 
 
 def validate_body(model: Type[BaseModel]) -> Tuple[BaseModel, int]:
@@ -75,27 +150,255 @@ def handle_validation_error(e: ValidationError):
     return jsonify({"error": "ValidationError", "details": e.errors()}), 400
 
 
+class InvalidProjection(ValueError):
+    """Unknown field requested via ?fields=; mapped to 400."""
+
+
+@app.errorhandler(InvalidProjection)
+def handle_invalid_projection(e: InvalidProjection):
+    return jsonify({"error": "InvalidFields", "details": str(e)}), 400
+
+
+DRAFT_FIELDS = frozenset(DraftReport.model_fields)
+
+
+def draft_projection() -> dict:
+    """
+    include / exclude arguments for DraftReport.model_dump from the query string:
+      ?fields=id,draft_markdown   only these top-level fields
+      ?chunks=ref                 doc_chunks without their text (doc_id, source, page, chunk_id, start_offset)
+    """
+    projection: dict = {}
+    fields = request.args.get("fields")
+    if fields:
+        include = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = include - DRAFT_FIELDS
+        if unknown:
+            raise InvalidProjection(f"unknown fields: {', '.join(sorted(unknown))}")
+        projection["include"] = include
+    if request.args.get("chunks") == "ref":
+        projection["exclude"] = {"doc_chunks": {"__all__": {"text"}}}
+    return projection
+
+
+def draft_response(draft: DraftReport, projection: dict, status: int = 200) -> Response:
+    # Pydantic's Rust serializer writes the JSON directly; no dict round trip through jsonify
+    return Response(draft.model_dump_json(**projection), status=status, mimetype="application/json")
+
+
+_COMPRESSIBLE = {"application/json", "text/plain", "text/html", "text/markdown"}
+
+
+@app.after_request
+def compress_response(resp: Response) -> Response:
+    """br / gzip for buffered text responses the client accepts; streams are left alone."""
+    if (
+        not settings.response_compression_enabled
+        or resp.is_streamed
+        or resp.direct_passthrough
+        or resp.mimetype not in _COMPRESSIBLE
+        or "Content-Encoding" in resp.headers
+    ):
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    if (resp.content_length or 0) < settings.response_compression_min_bytes:
+        return resp
+
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli else ["gzip"])
+    if encoding == "br":
+        resp.set_data(brotli.compress(resp.get_data(), quality=settings.response_brotli_quality))
+    elif encoding == "gzip":
+        resp.set_data(gzip.compress(resp.get_data(), compresslevel=settings.response_gzip_level))
+    else:
+        return resp
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
 @app.route("/healthz", methods=["GET"])
 def health_check():
+    # Liveness only: answers as soon as the process is serving
     return jsonify({"status": "ok", "environment": settings.environment})
 
 
+@app.route("/readyz", methods=["GET"])
+def readiness_check():
+    components = {
+        "document_index": _index_ready.is_set(),
+        **doc_store.warm_status(),
+        "tavily_client": web_search._tavily_client is not None,
+        "llm": graph.llm is not None,
+    }
+    # Retrieval needs the synced index and the model; the API clients are cheap to build lazily
+    ready = components["document_index"] and components["embedding_model"] and components["chroma"]
+    body = {"status": "ready" if ready else "warming", "components": components}
+    if _warmup_error:
+        body["error"] = _warmup_error
+    return jsonify(body), 200 if ready else 503
+
+
+@app.errorhandler(AdmissionRejected)
+def handle_admission_rejected(e: AdmissionRejected):
+    # Fail fast so the caller (or the load balancer) can retry elsewhere / later
+    resp = jsonify({"error": "Overloaded", "details": e.reason})
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp, e.status
+
+
 @app.route("/api/research/draft", methods=["POST"])
 def create_draft():
     REQUEST_DRAFT_COUNTER.inc()
     req_obj, _ = validate_body(ResearchRequest)
-    state = run_research(req_obj)
-    draft_id = str(uuid4())
+    projection = draft_projection()  # reject bad ?fields= before doing any work
+    # Honour "Cache-Control: no-cache" as an alternative to the bypass_cache body flag
+    if "no-cache" in request.headers.get("Cache-Control", ""):
+        req_obj.bypass_cache = True
+    # Only a request that runs the graph itself takes an execution slot
+    state = run_research(req_obj, admit=admission.slot)
+    draft = build_draft(state)
+    return draft_response(draft, projection)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(to_jsonable_python(data))}\n\n"
+
+
+@app.route("/api/research/draft/stream", methods=["POST"])
+def stream_draft():
+    """
+    Server-sent events: one event per graph node as it finishes
+    (web_search, doc_search, synthesis, report_generation) carrying that node's
+    results, "token" events while the LLM writes the synthesis, then a final
+    "draft" event with the full DraftReport.
+    """
+    REQUEST_DRAFT_COUNTER.inc()
+    req_obj, _ = validate_body(ResearchRequest)
+    if "no-cache" in request.headers.get("Cache-Control", ""):
+        req_obj.bypass_cache = True
+
+    def events():
+        try:
+            for node_name, update in stream_research(req_obj):
+                if node_name == "__end__":
+                    yield _sse("draft", build_draft(update).model_dump(mode="json"))
+                else:
+                    yield _sse(node_name, update)
+        except Exception as e:
+            yield _sse("error", {"error": type(e).__name__, "details": str(e)})
+
+    # The slot is held until the stream is closed, not just until this view returns
+    admission.acquire()
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream")
+    resp.call_on_close(admission.release)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # don't let proxies buffer the stream
+    return resp
+
+
+@app.route("/api/research/draft/batch", methods=["POST"])
+def create_draft_batch():
+    """
+    Body: a JSON list of ResearchRequests (or {"requests": [...]}).
+    Streams NDJSON, one line per item as it completes:
+      {"index": 3, "status": "ok", "draft": {...}}
+      {"index": 5, "status": "error", "error": "ValidationError", "details": ...}
+    Retrieval is shared across the batch; ?fields= / ?chunks= apply to each draft.
+    """
+    projection = draft_projection()
+    body = request.get_json(force=True, silent=True)
+    items = body.get("requests") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "ValidationError", "details": "expected a non-empty list of requests"}), 400
+    if len(items) > settings.batch_max_items:
+        return jsonify({
+            "error": "ValidationError",
+            "details": f"batch has {len(items)} items, max is {settings.batch_max_items}",
+        }), 400
+    REQUEST_DRAFT_COUNTER.inc(len(items))
+
+    # Invalid items are reported on their own line; the rest of the batch still runs
+    errors = []
+    valid: list[Tuple[int, ResearchRequest]] = []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, ResearchRequest.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": i, "status": "error", "error": "ValidationError",
+                           "details": e.errors(include_url=False)})
+
+    def error_line(i: int, e: Exception) -> str:
+        return json.dumps({"index": i, "status": "error", "error": type(e).__name__, "details": str(e)}) + "\n"
+
+    def lines():
+        for line in errors:
+            yield json.dumps(line, default=str) + "\n"
+        if not valid:
+            return
+        answered = set()
+        try:
+            for j, result in run_research_batch([req for _, req in valid]):
+                i = valid[j][0]
+                answered.add(j)
+                if isinstance(result, Exception):
+                    yield error_line(i, result)
+                    continue
+                draft = build_draft(result)
+                yield json.dumps({"index": i, "status": "ok", "draft": draft.model_dump(mode="json", **projection)}) + "\n"
+        except Exception as e:
+            # Every item still gets its own line, whatever broke
+            for j, (i, _) in enumerate(valid):
+                if j not in answered:
+                    yield error_line(i, e)
+
+    # One admission slot for the whole batch, held until the stream closes
+    admission.acquire()
+    resp = Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+    resp.call_on_close(admission.release)
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+@app.route("/api/research/jobs", methods=["POST"])
+def submit_draft_job():
+    REQUEST_DRAFT_COUNTER.inc()
+    req_obj, _ = validate_body(ResearchRequest)
+    if "no-cache" in request.headers.get("Cache-Control", ""):
+        req_obj.bypass_cache = True
 
-    draft = DraftReport(
-        id=draft_id,
-        query=state.query,
-        draft_markdown=state.draft_markdown or "",
-        web_results=state.web_results,
-        doc_chunks=state.doc_chunks,
-    )
-    # In a real system, store draft in DB/cache with id
-    return jsonify(draft.model_dump(mode="json")), 200
+    job_id = str(uuid4())
+    try:
+        job = job_manager.submit(run_draft_job, req_obj, job_id, job_id=job_id)
+    except QueueFullError as e:
+        # Reject early instead of letting every queued caller wait longer
+        resp = jsonify({"error": "QueueFull", "details": str(e)})
+        resp.headers["Retry-After"] = str(settings.job_retry_after_seconds)
+        return resp, 429
+
+    resp = jsonify({"job_id": job.id, "status": job.status})
+    resp.headers["Location"] = f"/api/research/jobs/{job.id}"
+    return resp, 202
+
+
+@app.route("/api/research/jobs/<job_id>", methods=["GET"])
+def get_draft_job(job_id: str):
+    projection = draft_projection()  # a bad ?fields= is a 400 whatever state the job is in
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "NotFound", "details": f"Unknown job id: {job_id}"}), 404
+
+    body = {
+        "job_id": job.id,
+        "status": job.status,
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == "succeeded":
+        body["draft"] = job.result.model_dump(mode="json", **projection)
+    elif job.status == "failed":
+        body["error"] = job.error
+    return jsonify(body), 200
 
 
 # @app.route("/api/research/finalize", methods=["POST"])
@@ -159,24 +462,32 @@ def finalize_report():
     REQUEST_FINALIZE_COUNTER.inc()
     feedback_obj, _ = validate_body(ReportFeedback)
 
-    # In a real system, you’d reload DraftReport by id.
-    # Here we trust the edited_markdown from Gradio as the final content.
-    final_id = feedback_obj.draft_id
+    # Reload the stored draft by id; the edited_markdown from Gradio is the final content
+    draft = draft_repository.get(feedback_obj.draft_id)
+    if draft is None:
+        return jsonify({
+            "error": "NotFound",
+            "details": f"Unknown or expired draft id: {feedback_obj.draft_id}",
+        }), 404
 
     final = FinalReport(
-        id=final_id,
-        query="(see draft metadata in your DB)",  # placeholder
+        id=draft.id,
+        query=draft.query,
         final_markdown=feedback_obj.edited_markdown,
-        citations=[],  # could re-attach from stored draft
+        citations=draft.citations,
     )
     # Persist final report, feedback metrics, etc.
     return jsonify(final.model_dump()), 200
 
 
 def create_app() -> Flask:
-    initialize_document_index()
+    if settings.background_warmup:
+        # Start serving /healthz right away; /readyz flips once warm-up finishes
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        warm_up()
     return app
 
 
 if __name__ == "__main__":
-    app.run(host=settings.flask_host, port=settings.flask_port, debug=settings.flask_debug)
+    create_app().run(host=settings.flask_host, port=settings.flask_port, debug=settings.flask_debug)
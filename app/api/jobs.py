@@ -0,0 +1,87 @@
+# app/api/jobs.py
+# Background execution of research drafts: a bounded queue in front of a fixed worker pool.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+from prometheus_client import Gauge, Histogram
+
+from app.cache import TTLCache
+
+
+JOB_QUEUE_DEPTH = Gauge(
+    "research_job_queue_depth",
+    "Draft jobs waiting for a worker",
+)
+
+JOB_QUEUE_WAIT = Histogram(
+    "research_job_queue_wait_seconds",
+    "Time a draft job spent queued before a worker picked it up",
+)
+
+JOB_RUN_TIME = Histogram(
+    "research_job_run_seconds",
+    "Time a worker spent running a draft job",
+    ["status"],
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity; the API maps this to 429."""
+
+
+@dataclass
+class Job:
+    id: str
+    status: str = "queued"  # queued → running → succeeded | failed
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+
+class JobManager:
+    def __init__(self, workers: int, max_queue: int, retention_seconds: float, max_retained: int):
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research-job")
+        self._jobs = TTLCache(max_entries=max_retained, ttl_seconds=retention_seconds)
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, job_id: Optional[str] = None) -> Job:
+        with self._lock:
+            if self._queued >= self.max_queue:
+                raise QueueFullError(f"job queue is full ({self.max_queue} waiting)")
+            self._queued += 1
+            JOB_QUEUE_DEPTH.set(self._queued)
+
+        job = Job(id=job_id or str(uuid4()), submitted_at=time.time())
+        self._jobs.set(job.id, job)
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple) -> None:
+        with self._lock:
+            self._queued -= 1
+            JOB_QUEUE_DEPTH.set(self._queued)
+
+        job.started_at = time.time()
+        job.status = "running"
+        JOB_QUEUE_WAIT.observe(job.started_at - job.submitted_at)
+
+        try:
+            job.result = fn(*args)
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            JOB_RUN_TIME.labels(status=job.status).observe(job.finished_at - job.started_at)
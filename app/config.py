@@ -11,6 +11,12 @@ class Settings(BaseSettings):
     # Tavily
     tavily_api_key: str = Field(..., alias="TAVILY_API_KEY")
 
+    # Tavily result cache (in-process LRU in front of a SQLite file shared by workers)
+    web_cache_enabled: bool = Field(default=True)
+    web_cache_max_entries: int = Field(default=512)
+    web_cache_ttl_seconds: int = Field(default=3600)
+    web_cache_path: str = Field(default="./cache/web_search.sqlite3")
+
     # GCP
     # gcp_project_id: str = Field(..., alias="GCP_PROJECT_ID")
     # gcp_region: str = Field(..., alias="GCP_REGION")
@@ -19,17 +25,156 @@ class Settings(BaseSettings):
     # Chroma
     chroma_persist_dir: str = Field(alias="CHROMA_PERSIST_DIR")
 
+    # Document indexing
+    index_workers: int = Field(default=0)  # 0 → os.cpu_count()
+    index_batch_size: int = Field(default=64)  # chunks per embedding/upsert batch
+    index_pages_per_task: int = Field(default=8)  # pages parsed per pool task
+    # Chunk bounds in embedding-model tokens (all-MiniLM-L6-v2 truncates at 256)
+    chunk_size_tokens: int = Field(default=200)
+    chunk_overlap_tokens: int = Field(default=30)
+
+    # Embedding inference backend: "torch", "onnx" or "onnx-int8" (see Dockerfile for the exports)
+    embedding_backend: str = Field(default="torch")
+    embedding_onnx_quantization: str = Field(default="avx2")  # int8 file: onnx/model_qint8_<this>.onnx
+
+    # Shared embedding server (python -m app.tools.embedding_server)
+    embedding_server_enabled: bool = Field(default=False)
+    embedding_server_socket: str = Field(default="/tmp/research-embeddings.sock")
+    embedding_server_max_batch_size: int = Field(default=64)
+    embedding_server_max_wait_ms: float = Field(default=5.0)
+    embedding_server_timeout_seconds: float = Field(default=30.0)
+    # Pending-connection backlog; clients retry a refused connect with jittered backoff
+    embedding_server_backlog: int = Field(default=128)
+    embedding_server_connect_retries: int = Field(default=5)
+    embedding_server_connect_backoff_seconds: float = Field(default=0.01)
+    embedding_server_metrics_port: int = Field(default=9101)  # 0 disables
+
+    # Retrieval: dense vectors fused with an in-process BM25 index
+    hybrid_retrieval_enabled: bool = Field(default=True)
+    hybrid_candidate_multiplier: int = Field(default=2)  # candidates per ranker = n_results * this
+    rrf_k: int = Field(default=60)
+
+    # Warehouse of past Tavily results (Chroma collection "web_results"). A search is
+    # answered locally when at least min_coverage * max_results stored pages fetched within
+    # max_age have cosine similarity >= min_similarity to the query; otherwise Tavily is called.
+    web_warehouse_enabled: bool = Field(default=True)
+    web_warehouse_max_age_seconds: int = Field(default=86400)
+    web_warehouse_min_similarity: float = Field(default=0.75)
+    web_warehouse_min_coverage: float = Field(default=0.6)
+    # Pages older than retention are deleted, checked at most once per prune interval on store
+    web_warehouse_retention_seconds: int = Field(default=7 * 86400)
+    web_warehouse_prune_interval_seconds: int = Field(default=3600)
+
+    # Query embedding cache (per process)
+    query_embedding_cache_size: int = Field(default=2048)
+    query_embedding_cache_ttl_seconds: int = Field(default=86400)
+
     # Flask
     flask_debug: bool = Field(default=False)
     flask_host: str = Field(default="0.0.0.0")
     flask_port: int = Field(default=5000)
     api_base:str = Field(alias="API_BASE")
+    # Sync the index and load models in a background thread after startup (see /readyz)
+    background_warmup: bool = Field(default=True)
+
+    # Async draft jobs
+    job_workers: int = Field(default=4)
+    job_max_queue: int = Field(default=32)
+    job_retention_seconds: int = Field(default=3600)
+    job_max_retained: int = Field(default=1000)
+    # Retry-After sent with the 429 when the job queue is full
+    job_retry_after_seconds: int = Field(default=5)
+
+    # POST /api/research/draft/batch: max items per batch, items finished concurrently
+    batch_max_items: int = Field(default=500)
+    batch_max_concurrency: int = Field(default=4)
+
+    # Admission control for /api/research/draft(/stream): concurrent graph runs, then a
+    # bounded wait queue; beyond it callers get 429, after the max wait 503 (both with Retry-After)
+    admission_max_concurrent: int = Field(default=8)
+    admission_max_queue: int = Field(default=16)
+    admission_max_queue_seconds: float = Field(default=10.0)
+    admission_retry_after_seconds: int = Field(default=5)
+
+    # Draft store (finalize reloads drafts by id)
+    draft_store_path: str = Field(default="./cache/drafts.sqlite3")
+    draft_ttl_seconds: int = Field(default=7 * 24 * 3600)
+    draft_cache_max_entries: int = Field(default=256)
+    # The draft_store_size gauge is recounted at most this often, not on every save
+    draft_store_size_refresh_seconds: float = Field(default=30.0)
 
     # Gradio
     gradio_host: str = Field(default="0.0.0.0")
     gradio_port: int = Field(default=8080)
     
 
+    # Agent graph
+    # True → web_search and doc_search fan out from START and fan in to report_generation
+    graph_parallel_retrieval: bool = Field(default=True)
+    # Expand each request into sub-queries (one per competitor, one for the industry)
+    query_expansion_enabled: bool = Field(default=True)
+    # Upper bound on concurrent Tavily calls across all requests
+    web_search_max_concurrency: int = Field(default=8)
+    # Threads running deadline-bound doc retrieval (embedding + Chroma) across all requests
+    doc_search_max_concurrency: int = Field(default=4)
+    # Identical requests within this window reuse the last result (0 disables the cache)
+    research_result_cache_ttl_seconds: int = Field(default=60)
+    research_result_cache_size: int = Field(default=128)
+    # Paraphrased queries (same industry / competitors) reuse a stored answer when the
+    # cosine similarity of their embeddings is at least the threshold
+    semantic_cache_enabled: bool = Field(default=True)
+    semantic_cache_threshold: float = Field(default=0.92)
+    semantic_cache_ttl_seconds: int = Field(default=3600)
+    semantic_cache_max_entries: int = Field(default=1000)
+
+    # Outbound HTTP (Tavily, UI -> API): pooled sessions, default timeouts, jittered retries
+    http_connect_timeout_seconds: float = Field(default=3.0)
+    http_read_timeout_seconds: float = Field(default=15.0)
+    http_max_retries: int = Field(default=2)
+    http_backoff_seconds: float = Field(default=0.3)
+    http_pool_connections: int = Field(default=10)
+    http_pool_maxsize: int = Field(default=32)
+    llm_timeout_seconds: float = Field(default=60.0)
+    llm_max_retries: int = Field(default=2)
+
+    # Near-duplicate suppression of retrieved web snippets / doc chunks (MinHash over
+    # word shingles); items at or above this estimated Jaccard similarity are collapsed
+    near_dup_enabled: bool = Field(default=True)
+    near_dup_threshold: float = Field(default=0.8)
+    near_dup_num_perm: int = Field(default=64)
+    near_dup_shingle_size: int = Field(default=3)
+
+    # LLM synthesis of the overview / competition / recommendations sections.
+    # Evidence is packed into a fixed prompt budget so cost and latency stay flat.
+    llm_synthesis_enabled: bool = Field(default=True)
+    llm_context_budget_tokens: int = Field(default=3000)
+    llm_max_item_tokens: int = Field(default=300)
+    llm_max_items_per_source: int = Field(default=3)
+    # Word-shingle Jaccard similarity above which a snippet counts as a near-duplicate
+    llm_dedup_threshold: float = Field(default=0.8)
+    llm_max_output_tokens: int = Field(default=1024)
+    # Part of the request deadline kept back from retrieval for synthesis: at most this
+    # many seconds, and at most this fraction of the request's deadline
+    llm_synthesis_budget_seconds: float = Field(default=8.0)
+    llm_synthesis_budget_fraction: float = Field(default=0.4)
+
+    # End-to-end budget per research request; web / doc retrieval still outstanding
+    # when it runs out is dropped and the draft is returned as partial
+    research_deadline_seconds: float = Field(default=20.0)
+    # Time kept back from retrieval for report generation and response serialization
+    deadline_reserve_seconds: float = Field(default=1.0)
+    # Share of the deadline retrieval always gets, however short the deadline
+    retrieval_min_budget_fraction: float = Field(default=0.3)
+
+    # Response compression (br when the brotli package is installed, else gzip)
+    response_compression_enabled: bool = Field(default=True)
+    response_compression_min_bytes: int = Field(default=1024)
+    response_gzip_level: int = Field(default=6)
+    response_brotli_quality: int = Field(default=4)
+
+    # Observability: append trace spans as JSON lines to this file (empty disables)
+    trace_file: str = Field(default="")
+
     # Misc
     environment: str = Field(default="dev")
 
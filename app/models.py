@@ -1,5 +1,6 @@
 # app/models.py
-from typing import List, Optional
+import operator
+from typing import Annotated, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -14,6 +15,8 @@ class DocumentChunk(BaseModel):
     source: str
     page: int
     text: str
+    chunk_id: Optional[str] = None
+    start_offset: Optional[int] = None  # character offset of the chunk within its page
 
 
 class ResearchRequest(BaseModel):
@@ -22,6 +25,10 @@ class ResearchRequest(BaseModel):
     competitors: Optional[List[str]] = None
     max_web_results: int = Field(default=5, ge=1, le=20)
     max_doc_chunks: int = Field(default=10, ge=1, le=50)
+    # Skip cached Tavily results and force a live web search
+    bypass_cache: bool = False
+    # Per-request time budget; defaults to settings.research_deadline_seconds
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=300)
 
 
 class DraftReport(BaseModel):
@@ -30,6 +37,13 @@ class DraftReport(BaseModel):
     draft_markdown: str
     web_results: List[WebSearchResult]
     doc_chunks: List[DocumentChunk]
+    citations: List[str] = Field(default_factory=list)
+    timings: Dict[str, float] = Field(default_factory=dict)
+    # Set when a source was skipped (timed out / failed) and the draft was built without it
+    partial: bool = False
+    partial_sources: List[str] = Field(default_factory=list)
+    # Set on a semantic cache hit: the earlier, similar query whose answer was reused
+    semantic_cache_query: Optional[str] = None
 
 
 class ReportFeedback(BaseModel):
@@ -46,14 +60,41 @@ class FinalReport(BaseModel):
     citations: List[str]
 
 
+def merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """Reducer for per-node timings written by parallel graph branches."""
+    return {**(left or {}), **(right or {})}
+
+
 # LangGraph state model (Pydantic)
+# List fields written by the retrieval branches use additive reducers so that
+# web_search and doc_search can run in the same superstep and fan back in.
 class ResearchState(BaseModel):
     query: str
     industry: Optional[str] = None
     competitors: Optional[List[str]] = None
-
-    web_results: List[WebSearchResult] = Field(default_factory=list)
-    doc_chunks: List[DocumentChunk] = Field(default_factory=list)
-
+    max_web_results: int = 5
+    max_doc_chunks: int = 10
+    bypass_cache: bool = False
+    # Unix time by which the draft must be returned (None: no deadline)
+    deadline: Optional[float] = None
+    # The budget the deadline was set from, in seconds; reserves scale with it
+    deadline_seconds: Optional[float] = None
+
+    web_results: Annotated[List[WebSearchResult], operator.add] = Field(default_factory=list)
+    doc_chunks: Annotated[List[DocumentChunk], operator.add] = Field(default_factory=list)
+
+    # LLM-written report sections keyed overview / competition / recommendations
+    synthesis: Dict[str, str] = Field(default_factory=dict)
     draft_markdown: Optional[str] = None
     citations: List[str] = Field(default_factory=list)
+
+    # Sources that missed the deadline or failed ("web_search", "synthesis", ...)
+    partial_sources: Annotated[List[str], operator.add] = Field(default_factory=list)
+    # Serialized bytes of retrieved items dropped as near-duplicates (summed across branches)
+    near_dup_bytes_saved: Annotated[int, operator.add] = 0
+    # Query of the cached answer this state was reused from (semantic cache hit)
+    semantic_cache_query: Optional[str] = None
+
+    # Seconds spent in each graph node (plus "total" for the whole run)
+    timings: Annotated[Dict[str, float], merge_timings] = Field(default_factory=dict)
+
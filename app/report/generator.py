@@ -1,5 +1,5 @@
 # This converts state into a structured Markdown report.
-from typing import List
+from typing import Dict, List
 from textwrap import dedent
 
 from app.models import ResearchState, WebSearchResult, DocumentChunk
@@ -22,19 +22,72 @@ def _format_doc_chunks(chunks: List[DocumentChunk]) -> str:
     return "\n".join(lines)
 
 
+def _page_ranges(pages: List[int]) -> str:
+    """Collapse page numbers into ranges: [1, 2, 3, 7] -> 1-3, 7"""
+    ranges = []
+    pages = sorted(set(pages))
+    start = prev = pages[0]
+    for page in pages[1:] + [None]:
+        if page is not None and page == prev + 1:
+            prev = page
+            continue
+        ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        if page is not None:
+            start = prev = page
+    return ", ".join(ranges)
+
+
+def _doc_citations(chunks: List[DocumentChunk]) -> List[str]:
+    """One citation per document, listing the pages used: "report.pdf, pp. 3-5, 9"."""
+    pages: Dict[str, List[int]] = {}
+    for c in chunks:
+        pages.setdefault(str(c.source), []).append(c.page)
+    citations = []
+    for source, source_pages in pages.items():
+        label = "p." if len(set(source_pages)) == 1 else "pp."
+        citations.append(f"{source}, {label} {_page_ranges(source_pages)}")
+    return citations
+
+
 def generate_draft_report(state: ResearchState) -> ResearchState:
     web_section = _format_web_results(state.web_results) or "No web data."
+    if "web_search" in state.partial_sources:
+        web_section += "\n\n_Partial: some web searches timed out or failed; results may be incomplete._"
     doc_section = _format_doc_chunks(state.doc_chunks) or "No internal docs data."
+    if "doc_search" in state.partial_sources:
+        doc_section += "\n\n_Partial: the document search ran out of time; results may be incomplete._"
 
     industry = state.industry or "Not specified"
     competitors = ", ".join(state.competitors or []) or "Not specified"
-
+    synthesis = state.synthesis or {}
+
+    overview = synthesis.get("overview") or (
+        f"Summarize the overall market landscape for **{industry}**,\n"
+        "including size, growth trends, and major dynamics."
+    )
+    competition = synthesis.get("competition") or (
+        "Describe the positioning and strategies of key competitors:\n"
+        f"{competitors}."
+    )
+    recommendations = synthesis.get("recommendations") or (
+        "Provide actionable recommendations based on the combined web\n"
+        "and internal document insights."
+    )
+    if "synthesis" in state.partial_sources:
+        recommendations += "\n\n_Partial: the LLM summary was cut short or unavailable._"
+
+    query = state.query
+    if state.semantic_cache_query:
+        query += f"\n\n_Answered from the cached report for a similar query: \"{state.semantic_cache_query}\"._"
+
+    # Dedent the template before filling it in: multi-line values have no
+    # indentation, so dedenting afterwards would leave the template indented.
     draft = dedent(
-        f"""
+        """
         # Market Research Report
 
         ## Query
-        {state.query}
+        {query}
 
         - Industry: {industry}
         - Competitors: {competitors}
@@ -43,13 +96,11 @@ def generate_draft_report(state: ResearchState) -> ResearchState:
 
         ## 1. High-Level Market Overview
 
-        Summarize the overall market landscape for **{industry}**,
-        including size, growth trends, and major dynamics.
+        {overview}
 
         ## 2. Competitive Landscape
 
-        Describe the positioning and strategies of key competitors:
-        {competitors or "Not specified"}.
+        {competition}
 
         ## 3. Web Research Findings
 
@@ -61,16 +112,24 @@ def generate_draft_report(state: ResearchState) -> ResearchState:
 
         ## 5. Synthesis & Recommendations
 
-        Provide actionable recommendations based on the combined web
-        and internal document insights.
+        {recommendations}
 
         ---
         """
-    ).strip()
-
-    citations = [str(r.url) for r in state.web_results] + [
-        str(c.source) for c in state.doc_chunks
-    ]
+    ).strip().format(
+        query=query,
+        industry=industry,
+        competitors=competitors,
+        overview=overview,
+        competition=competition,
+        web_section=web_section,
+        doc_section=doc_section,
+        recommendations=recommendations,
+    )
+
+    citations = list(dict.fromkeys(str(r.url) for r in state.web_results)) + _doc_citations(
+        state.doc_chunks
+    )
 
     state.draft_markdown = draft
     state.citations = citations
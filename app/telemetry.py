@@ -0,0 +1,129 @@
+# app/telemetry.py
+# Latency histograms, result-size gauges and lightweight trace spans for the research pipeline.
+#
+# Spans follow the OpenTelemetry data model (trace/span/parent ids, start/end in
+# unix nanos, attributes, status) and are written as JSON lines to TRACE_FILE
+# when it is set. Context propagates through contextvars, so spans opened inside
+# graph nodes nest under the request's root span.
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import Gauge, Histogram
+
+from app.config import settings
+
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+NODE_LATENCY = Histogram(
+    "research_graph_node_seconds",
+    "Wall-clock time per research graph node",
+    ["node", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+TOOL_LATENCY = Histogram(
+    "research_tool_call_seconds",
+    "Wall-clock time per tool call under the graph (Tavily, embedding, Chroma, BM25)",
+    ["tool", "operation", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+# Every Gemini call (draft synthesis, finalize); the name predates synthesis
+LLM_LATENCY_HISTOGRAM = Histogram(
+    "llm_finalize_latency_seconds",
+    "Time spent in LLM calls",
+    buckets=_LATENCY_BUCKETS,
+)
+
+RESULT_SIZE = Gauge(
+    "research_result_size",
+    "Size of the most recent draft: web_results / doc_chunks (count), markdown_bytes",
+    ["kind"],
+)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_unix_nano: int
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+def _export(span: Span) -> None:
+    if not settings.trace_file:
+        return
+    line = json.dumps(span.__dict__, default=str)
+    with _export_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(settings.trace_file)), exist_ok=True)
+        with open(settings.trace_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Open a child of the current span (or a new trace) for the duration of the block."""
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+        span_id=os.urandom(8).hex(),
+        parent_span_id=parent.span_id if parent else None,
+        start_time_unix_nano=time.time_ns(),
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.set_attribute("exception.type", type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_time_unix_nano = time.time_ns()
+        _export(current)
+
+
+def record_exception(e: BaseException) -> None:
+    """Mark the current span failed for an error the caller handles instead of raising."""
+    current = _current_span.get()
+    if current is not None:
+        current.status = "ERROR"
+        current.set_attribute("exception.type", type(e).__name__)
+        current.set_attribute("exception.message", str(e))
+
+
+@contextmanager
+def timed_tool(tool: str, operation: str, **attributes: Any) -> Iterator[Span]:
+    """Histogram + span around one tool call, labelled with its outcome."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with span(f"{tool}.{operation}", **attributes) as s:
+            yield s
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        TOOL_LATENCY.labels(tool=tool, operation=operation, outcome=outcome).observe(
+            time.perf_counter() - start
+        )
@@ -0,0 +1,47 @@
+# app/tools/chunking.py
+# Token-aware sub-page chunking for indexing.
+# all-MiniLM-L6-v2 truncates input at 256 word pieces, so whole PDF pages lose
+# their tail when embedded. Pages are split into chunks sized in model tokens.
+from functools import lru_cache
+from typing import List, Tuple
+
+from app.config import settings
+from app.tools.embeddings import embedding_model_id, embedding_model_name
+
+
+def chunker_signature() -> str:
+    """Identifies the chunking + embedding setup; a change means the corpus must be re-indexed."""
+    return f"{embedding_model_id}|{settings.chunk_size_tokens}|{settings.chunk_overlap_tokens}"
+
+
+@lru_cache(maxsize=1)
+def _splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    kwargs = dict(
+        chunk_size=settings.chunk_size_tokens,
+        chunk_overlap=settings.chunk_overlap_tokens,
+    )
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(embedding_model_name)
+        return RecursiveCharacterTextSplitter.from_huggingface_tokenizer(tokenizer, **kwargs)
+    except Exception:
+        # No tokenizer available (e.g. slim dev env): ~4 characters per word piece
+        return RecursiveCharacterTextSplitter(length_function=lambda t: len(t) // 4 + 1, **kwargs)
+
+
+def chunk_page(text: str) -> List[Tuple[int, str]]:
+    """Split one page into (start_offset, chunk_text) pairs, offsets into the page text."""
+    # Offsets are located here rather than via add_start_index, which assumes the
+    # overlap is measured in characters and mis-places chunks with a token length_function.
+    chunks: List[Tuple[int, str]] = []
+    cursor = 0
+    for chunk in _splitter().split_text(text):
+        start = text.find(chunk, cursor)
+        if start < 0:
+            start = text.find(chunk)
+        chunks.append((max(start, 0), chunk))
+        cursor = max(start, 0) + 1
+    return chunks
@@ -1,79 +1,306 @@
+import hashlib
+import json
+import multiprocessing
 import os
-from typing import List
-from uuid import uuid4
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterator, List, Optional, Tuple
 
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-
-from pypdf import PdfReader
+from prometheus_client import Counter
 
+from app.cache import TTLCache, normalize_text
 from app.config import settings
 from app.models import DocumentChunk
+from app.telemetry import timed_tool
+from app.tools.chunking import chunk_page, chunker_signature
+from app.tools.embeddings import embedding_model_id, get_embedding_function
+from app.tools.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.tools.pdf_extract import count_pages, extract_page_range
+
+
+# Heavy singletons (Chroma client, embedding model, BM25 index) are built on
+# first use so importing this module stays cheap; warm_up() builds them eagerly.
+_chroma_client = None
+_embedding_function = None
+_collection = None
+_lexical_index = None
+_init_lock = threading.RLock()
+
+
+def _get_embedding_function():
+    """Local SentenceTransformer or the shared embedding server, per Settings."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _init_lock:
+            if _embedding_function is None:
+                _embedding_function = get_embedding_function()
+    return _embedding_function
+
+
+def get_chroma_client():
+    """The process-wide Chroma client; other collections (e.g. caches) share it."""
+    global _chroma_client
+    if _chroma_client is None:
+        with _init_lock:
+            if _chroma_client is None:
+                import chromadb
+
+                _chroma_client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
+    return _chroma_client
+
+
+def _get_collection():
+    global _collection
+    if _collection is None:
+        with _init_lock:
+            if _collection is None:
+                from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+                embedding_function = _get_embedding_function()
+                # Chroma persists the embedding function's name with the collection, so only the
+                # local SentenceTransformer is attached. Embeddings are always computed here and
+                # passed explicitly, which lets every backend share the same collection.
+                _collection = get_chroma_client().get_or_create_collection(
+                    name="research_docs",
+                    embedding_function=(
+                        embedding_function
+                        if isinstance(embedding_function, SentenceTransformerEmbeddingFunction)
+                        else None
+                    ),
+                )
+    return _collection
+
 
+def _get_lexical_index() -> "BM25Index":
+    global _lexical_index
+    if _lexical_index is None:
+        with _init_lock:
+            if _lexical_index is None:
+                _lexical_index = _load_lexical_index()
+    return _lexical_index
 
-# Initialize Chroma persistent client
-_chroma_client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
 
-# _embedding_function = SentenceTransformerEmbeddingFunction(
-#     model_name="sentence-transformers/all-MiniLM-L6-v2"
-# )
+def warm_up() -> None:
+    """Load the model, open Chroma and the BM25 index now instead of on the first request."""
+    _get_collection()
+    _get_lexical_index()
 
-# _embedding_function = SentenceTransformerEmbeddingFunction(
-#     model_name="sentence-transformers/all-MiniLM-L6-v2",
-#     device="cpu"
-# )
 
-# Load from the local directory we created in the Dockerfile
-model_path = "./model_cache"
+def warm_status() -> Dict[str, bool]:
+    return {
+        "embedding_model": _embedding_function is not None,
+        "chroma": _collection is not None,
+        "lexical_index": _lexical_index is not None,
+    }
 
-if os.path.exists(model_path):
-    _embedding_function = SentenceTransformerEmbeddingFunction(model_name=model_path)
-else:
-    # Fallback for local development if not in Docker
-    _embedding_function = SentenceTransformerEmbeddingFunction(model_name='sentence-transformers/all-MiniLM-L6-v2')
 
+QUERY_EMBEDDING_CACHE_HITS = Counter(
+    "query_embedding_cache_hits_total",
+    "Query embeddings served from cache",
+)
+
+QUERY_EMBEDDING_CACHE_MISSES = Counter(
+    "query_embedding_cache_misses_total",
+    "Query embeddings computed by the model",
+)
 
-_collection = _chroma_client.get_or_create_collection(
-    name="research_docs",
-    embedding_function=_embedding_function,
+# Normalized query text → embedding; the model id (name + backend) is part of the key so
+# switching models never serves vectors from a different embedding space
+_query_embedding_cache = TTLCache(
+    max_entries=settings.query_embedding_cache_size,
+    ttl_seconds=settings.query_embedding_cache_ttl_seconds,
 )
 
 
-def _index_pdf_file(doc_id: str, source: str, local_path: str) -> None:
-    """Extract text from PDF pages and index into Chroma"""
-    reader = PdfReader(local_path)
+# Manifest of indexed files lives next to the Chroma data so both are wiped together
+MANIFEST_PATH = os.path.join(settings.chroma_persist_dir, "doc_manifest.json")
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_manifest() -> Dict[str, dict]:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: Dict[str, dict]) -> None:
+    os.makedirs(os.path.dirname(MANIFEST_PATH) or ".", exist_ok=True)
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+# BM25 index over the same chunks, persisted next to the Chroma data
+LEXICAL_INDEX_PATH = os.path.join(settings.chroma_persist_dir, "lexical_index.pkl")
+
+
+def _load_lexical_index() -> BM25Index:
+    """Load the persisted BM25 index, rebuilding it from Chroma if it is missing."""
+    if os.path.exists(LEXICAL_INDEX_PATH):
+        return BM25Index.load(LEXICAL_INDEX_PATH)
+
+    index = BM25Index()
+    page_size = 1000
+    offset = 0
+    while True:
+        page = _get_collection().get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        index.add(page["ids"], page["documents"], [m["source"] for m in page["metadatas"]])
+        offset += page_size
+    if len(index):
+        index.save(LEXICAL_INDEX_PATH)
+    return index
+
+
+
+def _delete_source(source: str) -> None:
+    """Remove every chunk indexed for a file (also catches legacy uuid-based ids)."""
+    _get_collection().delete(where={"source": source})
+    _get_lexical_index().remove_source(source)
+
+
+# (doc_id, source, local_path) for a file that needs (re)indexing
+IndexTask = Tuple[str, str, str]
+
+
+def _extraction_workers() -> int:
+    return settings.index_workers or os.cpu_count() or 1
+
+
+def _extraction_context() -> multiprocessing.context.BaseContext:
+    """
+    Never fork: a sync can run inside the API process, whose request and pool threads
+    would be copied mid-lock into the workers. forkserver workers fork from a clean
+    single-threaded server that preloads only the PDF extractor; spawn is the fallback.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.tools.pdf_extract"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _iter_extracted_pages(files: List[IndexTask]) -> Iterator[Tuple[str, str, int, str]]:
+    """
+    Yield (doc_id, source, page, text) for every non-empty page of every file.
+
+    Files are split into page ranges that are parsed in a process pool. Only a
+    small window of ranges is in flight at once, so memory stays bounded
+    regardless of corpus size. Pages are yielded in completion order.
+    """
+    pages_per_task = max(1, settings.index_pages_per_task)
+    tasks = []
+    for doc_id, source, local_path in files:
+        n_pages = count_pages(local_path)
+        for start in range(0, n_pages, pages_per_task):
+            tasks.append((doc_id, source, local_path, start, start + pages_per_task))
+
+    workers = min(_extraction_workers(), len(tasks))
+    if workers <= 1:
+        for doc_id, source, local_path, start, stop in tasks:
+            for page, text in extract_page_range(local_path, start, stop):
+                yield doc_id, source, page, text
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_extraction_context()) as pool:
+        pending = deque()
+        task_iter = iter(tasks)
+
+        def submit_next() -> bool:
+            task = next(task_iter, None)
+            if task is None:
+                return False
+            doc_id, source, local_path, start, stop = task
+            future = pool.submit(extract_page_range, local_path, start, stop)
+            pending.append((doc_id, source, future))
+            return True
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            doc_id, source, future = pending.popleft()
+            pages = future.result()
+            submit_next()
+            for page, text in pages:
+                yield doc_id, source, page, text
+
+
+def _index_pdf_files(files: List[IndexTask]) -> Tuple[int, int]:
+    """
+    Extract text from PDF pages, split each page into token-sized chunks and
+    upsert them into Chroma in fixed-size batches.
+    Returns (pages, chunks) indexed.
+    """
+    batch_size = max(1, settings.index_batch_size)
     texts: List[str] = []
     ids: List[str] = []
     metadatas: List[dict] = []
+    pages = 0
+    chunks = 0
 
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text() or ""
-        text = text.strip()
-        if not text:
-            continue
-
-        chunk_id = f"{doc_id}_page_{i}"
+    def flush() -> None:
+        if texts:
+            # Chunk ids are derived from the content hash, so upsert is idempotent
+            with timed_tool("embedding", "documents", batch=len(texts)):
+                embeddings = _get_embedding_function()(texts)
+            with timed_tool("chroma", "upsert", batch=len(texts)):
+                _get_collection().upsert(
+                    documents=texts,
+                    embeddings=embeddings,
+                    ids=ids,
+                    metadatas=metadatas,
+                )
+            _get_lexical_index().add(ids, texts, [m["source"] for m in metadatas])
+            texts.clear()
+            ids.clear()
+            metadatas.clear()
 
-        texts.append(text)
-        ids.append(chunk_id)
-        metadatas.append({
-            "doc_id": doc_id,
-            "source": source,
-            "page": i
-        })
+    for doc_id, source, page, page_text in _iter_extracted_pages(files):
+        pages += 1
+        for n, (start, text) in enumerate(chunk_page(page_text)):
+            texts.append(text)
+            ids.append(f"{doc_id}_page_{page}_chunk_{n}")
+            metadatas.append({
+                "doc_id": doc_id,
+                "source": source,
+                "page": page,
+                "chunk": n,
+                "start": start,
+                "end": start + len(text),
+            })
+            chunks += 1
+            if len(texts) >= batch_size:
+                flush()
 
-    if texts:
-        _collection.add(
-            documents=texts,
-            ids=ids,
-            metadatas=metadatas,
-        )
+    flush()
+    return pages, chunks
 
 
-def sync_local_docs(folder_path: str) -> None:
+def sync_local_docs(folder_path: str, force: bool = False) -> Dict[str, int]:
     """
-    Load PDF files from a local directory and index into Chroma.
-    Call once on startup.
+    Incrementally sync PDF files from a local directory into Chroma.
+    Safe to call on every startup.
+
+    A manifest keyed by file name records size, mtime and content hash.
+    Unchanged files are skipped without re-reading them, new or modified
+    files are (re)indexed under a content-derived doc_id, and chunks of
+    files that disappeared from the folder are deleted. force=True re-indexes
+    every file regardless of the manifest.
 
     Example:
     sync_local_docs("./data/docs")
@@ -81,38 +308,236 @@ def sync_local_docs(folder_path: str) -> None:
     if not os.path.exists(folder_path):
         raise FileNotFoundError(f"Document folder not found: {folder_path}")
 
-    for file in os.listdir(folder_path):
+    manifest = _load_manifest()
+    seen = set()
+    to_index: List[IndexTask] = []
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "pages": 0, "chunks": 0}
+    # Files indexed with a different chunker/model must be re-embedded
+    signature = chunker_signature()
+
+    for file in sorted(os.listdir(folder_path)):
         if not file.lower().endswith(".pdf"):
             continue
 
+        seen.add(file)
         doc_path = os.path.join(folder_path, file)
-        doc_id = str(uuid4())
+        stat = os.stat(doc_path)
+        previous = manifest.get(file)
+        entry = None if force or (previous or {}).get("chunker") != signature else previous
+
+        # Cheap check first: same size and mtime → assume unchanged
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            stats["unchanged"] += 1
+            continue
+
+        sha256 = _file_sha256(doc_path)
+        if entry and entry["sha256"] == sha256:
+            # Touched but not modified; just refresh the stat info
+            entry.update(size=stat.st_size, mtime=stat.st_mtime)
+            stats["unchanged"] += 1
+            continue
+
+        # Deterministic id: same file name + same bytes → same chunk ids on every sync
+        doc_id = hashlib.sha256(f"{file}:{sha256}".encode("utf-8")).hexdigest()[:32]
+        _delete_source(file)
+        to_index.append((doc_id, file, doc_path))
+        manifest[file] = {
+            "doc_id": doc_id,
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunker": signature,
+        }
+        stats["updated" if previous else "added"] += 1
+
+    stats["pages"], stats["chunks"] = _index_pdf_files(to_index)
+
+    for file in list(manifest):
+        if file not in seen:
+            _delete_source(file)
+            del manifest[file]
+            stats["removed"] += 1
+
+    lexical_index = _get_lexical_index()
+    if lexical_index.dirty:
+        lexical_index.save(LEXICAL_INDEX_PATH)
+
+    # Saved only after all upserts succeeded, so a failed sync is retried next time
+    _save_manifest(manifest)
+    return stats
+
+
+def embed_documents(texts: List[str]) -> List[List[float]]:
+    """Embed texts for storage (no cache); used by collections outside the document index."""
+    with timed_tool("embedding", "documents", batch=len(texts)):
+        return [[float(x) for x in vector] for vector in _get_embedding_function()(texts)]
+
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embed queries, reusing cached vectors; all cache misses go to the model in one batch."""
+    texts = [normalize_text(q) for q in queries]
+    embeddings: List[List[float] | None] = []
+    missing: Dict[str, List[int]] = {}
+
+    for i, text in enumerate(texts):
+        embedding = _query_embedding_cache.get((embedding_model_id, text))
+        if embedding is not None:
+            QUERY_EMBEDDING_CACHE_HITS.inc()
+        else:
+            missing.setdefault(text, []).append(i)
+        embeddings.append(embedding)
 
-        _index_pdf_file(
-            doc_id=doc_id,
-            source=file,
-            local_path=doc_path,
-        )
+    if missing:
+        QUERY_EMBEDDING_CACHE_MISSES.inc(len(missing))
+        batch = list(missing)
+        with timed_tool("embedding", "query", batch=len(batch)):
+            vectors = _get_embedding_function()(batch)
+        for text, vector in zip(batch, vectors):
+            embedding = [float(x) for x in vector]
+            _query_embedding_cache.set((embedding_model_id, text), embedding)
+            for i in missing[text]:
+                embeddings[i] = embedding
 
-    _chroma_client.persist()
+    return embeddings
 
 
-def query_docs(query: str, n_results: int = 10) -> List[DocumentChunk]:
-    """Embed + retrieve matched chunks with metadata"""
-    res = _collection.query(query_texts=[query], n_results=n_results)
-    docs = res.get("documents", [[]])[0]
-    metadatas = res.get("metadatas", [[]])[0]
+def embed_query(query: str) -> List[float]:
+    """Embed a query, reusing the cached vector for repeated (normalized) text."""
+    return embed_queries([query])[0]
 
-    chunks: List[DocumentChunk] = []
 
-    for text, meta in zip(docs, metadatas):
-        chunks.append(
-            DocumentChunk(
-                doc_id=meta["doc_id"],
-                source=meta["source"],
-                page=meta["page"],
-                text=text[:2000],  # trim chunk for quality
+def _vector_search(queries: List[str], n_results: int) -> List[Dict[str, list]]:
+    # One Chroma round trip for every query in the batch
+    embeddings = embed_queries(queries)
+    with timed_tool("chroma", "query", n_results=n_results, batch=len(queries)):
+        res = _get_collection().query(query_embeddings=embeddings, n_results=n_results)
+    return [
+        {"ids": ids, "documents": documents, "metadatas": metadatas}
+        for ids, documents, metadatas in zip(res["ids"], res["documents"], res["metadatas"])
+    ]
+
+
+def _hybrid_search(queries: List[str], n_results: int) -> List[Dict[str, list]]:
+    """Fuse dense and BM25 rankings with reciprocal rank fusion, per query."""
+    n_candidates = n_results * settings.hybrid_candidate_multiplier
+    dense_results = _vector_search(queries, n_candidates)
+
+    found = {}
+    fused: List[List[str]] = []
+    for query, dense in zip(queries, dense_results):
+        with timed_tool("bm25", "search", k=n_candidates):
+            lexical_ids = [chunk_id for chunk_id, _ in _get_lexical_index().search(query, n_candidates)]
+        fused.append(reciprocal_rank_fusion([dense["ids"], lexical_ids], k=settings.rrf_k)[:n_results])
+        for chunk_id, text, meta in zip(dense["ids"], dense["documents"], dense["metadatas"]):
+            found[chunk_id] = (text, meta)
+
+    # Lexical-only hits for the whole batch are fetched together
+    missing = list(dict.fromkeys(chunk_id for ids in fused for chunk_id in ids if chunk_id not in found))
+    if missing:
+        with timed_tool("chroma", "get", ids=len(missing)):
+            extra = _get_collection().get(ids=missing, include=["documents", "metadatas"])
+        for chunk_id, text, meta in zip(extra["ids"], extra["documents"], extra["metadatas"]):
+            found[chunk_id] = (text, meta)
+
+    results = []
+    for fused_ids in fused:
+        fused_ids = [chunk_id for chunk_id in fused_ids if chunk_id in found]
+        results.append({
+            "ids": fused_ids,
+            "documents": [found[chunk_id][0] for chunk_id in fused_ids],
+            "metadatas": [found[chunk_id][1] for chunk_id in fused_ids],
+        })
+    return results
+
+
+# Deadline-bound searches run here so the caller can stop waiting; an abandoned
+# search finishes in the background without tying up more than these threads
+_search_pool = ThreadPoolExecutor(
+    max_workers=settings.doc_search_max_concurrency,
+    thread_name_prefix="doc-search",
+)
+
+
+def submit_doc_search(queries: List[str], n_results: int = 10, hybrid: bool | None = None) -> Future:
+    """Start query_docs_many on the shared doc-search pool; the future resolves to its results."""
+    # copy_context keeps trace spans nested under the calling graph node
+    return _search_pool.submit(contextvars.copy_context().run, query_docs_many, queries, n_results, hybrid)
+
+
+def query_docs_many(
+    queries: List[str],
+    n_results: int = 10,
+    hybrid: bool | None = None,
+    timeout: Optional[float] = None,
+) -> List[Optional[List[DocumentChunk]]]:
+    """
+    Batched query_docs: one embedding call and one Chroma query for all queries.
+    The batch is all-or-nothing: if it is still running after timeout seconds,
+    every query yields None.
+    """
+    if not queries:
+        return []
+    if timeout is not None:
+        if timeout <= 0:
+            return [None for _ in queries]
+        try:
+            return submit_doc_search(queries, n_results, hybrid).result(timeout=timeout)
+        except FutureTimeoutError:
+            print(f"Doc search timed out after {timeout}s: {queries!r}")
+            return [None for _ in queries]
+
+    if hybrid is None:
+        hybrid = settings.hybrid_retrieval_enabled
+    results = _hybrid_search(queries, n_results) if hybrid else _vector_search(queries, n_results)
+
+    batches: List[List[DocumentChunk]] = []
+    for res in results:
+        chunks: List[DocumentChunk] = []
+        for chunk_id, text, meta in zip(res["ids"], res["documents"], res["metadatas"]):
+            chunks.append(
+                DocumentChunk(
+                    doc_id=meta["doc_id"],
+                    source=meta["source"],
+                    page=meta["page"],
+                    text=text[:2000],  # trim chunk for quality
+                    chunk_id=chunk_id,
+                    start_offset=meta.get("start"),
+                )
             )
-        )
+        batches.append(chunks)
+
+    return batches
+
+
+def query_docs(query: str, n_results: int = 10, hybrid: bool | None = None) -> List[DocumentChunk]:
+    """Embed + retrieve matched chunks with metadata (dense, or dense + BM25 fused)"""
+    return query_docs_many([query], n_results, hybrid)[0]
+
+
+if __name__ == "__main__":
+    # Re-index a folder and report extraction + embedding throughput:
+    #   python -m app.tools.doc_store data/documents --force --workers 4
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync PDFs into the Chroma index")
+    parser.add_argument("folder", nargs="?", default="data/documents")
+    parser.add_argument("--force", action="store_true", help="re-index every file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        settings.index_workers = args.workers
+    if args.batch_size is not None:
+        settings.index_batch_size = args.batch_size
 
-    return chunks
+    started = time.perf_counter()
+    result = sync_local_docs(args.folder, force=args.force)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        **result,
+        "workers": _extraction_workers(),
+        "batch_size": settings.index_batch_size,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(result["pages"] / elapsed, 2) if elapsed > 0 else None,
+    }))
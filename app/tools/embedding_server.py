@@ -0,0 +1,163 @@
+# app/tools/embedding_server.py
+# One process that owns the embedding model and serves all API workers over a Unix socket.
+# Concurrent requests are merged into micro-batches (max batch size / max wait).
+#
+# Run:   python -m app.tools.embedding_server
+# Use:   EMBEDDING_SERVER_ENABLED=true in the API process
+import os
+import queue
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from prometheus_client import Histogram, start_http_server
+
+from app.config import settings
+from app.tools.embeddings import build_local_embedding_function, recv_frame, send_frame
+
+
+EMBED_BATCH_SIZE = Histogram(
+    "embedding_server_batch_size",
+    "Number of texts embedded per model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+EMBED_QUEUE_WAIT = Histogram(
+    "embedding_server_queue_wait_seconds",
+    "Time a request waited before its batch started",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+EMBED_BATCH_LATENCY = Histogram(
+    "embedding_server_batch_seconds",
+    "Model time per micro-batch",
+)
+
+
+@dataclass
+class _PendingRequest:
+    texts: List[str]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    done: threading.Event = field(default_factory=threading.Event)
+    embeddings: Optional[List[List[float]]] = None
+    error: Optional[str] = None
+
+
+class MicroBatcher:
+    """Collects requests from many connections and runs them through the model together."""
+
+    def __init__(self, embed_fn: Callable[[List[str]], list], max_batch_size: int, max_wait_ms: float):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._carry: Optional[_PendingRequest] = None
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> _PendingRequest:
+        req = _PendingRequest(texts=texts)
+        self._queue.put(req)
+        req.done.wait()
+        return req
+
+    def _next_batch(self) -> List[_PendingRequest]:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch = [first]
+        size = len(first.texts)
+        deadline = first.enqueued_at + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                req = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(req.texts) > self.max_batch_size:
+                # Doesn't fit; it opens the next batch instead
+                self._carry = req
+                break
+            batch.append(req)
+            size += len(req.texts)
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            texts: List[str] = []
+            for req in batch:
+                EMBED_QUEUE_WAIT.observe(started - req.enqueued_at)
+                texts.extend(req.texts)
+            EMBED_BATCH_SIZE.observe(len(texts))
+
+            try:
+                with EMBED_BATCH_LATENCY.time():
+                    vectors = [[float(x) for x in v] for v in self.embed_fn(texts)]
+            except Exception as e:  # surface model errors to every caller in the batch
+                for req in batch:
+                    req.error = str(e)
+                    req.done.set()
+                continue
+
+            offset = 0
+            for req in batch:
+                req.embeddings = vectors[offset:offset + len(req.texts)]
+                offset += len(req.texts)
+                req.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        batcher: MicroBatcher = self.server.batcher  # type: ignore[attr-defined]
+        # Connections are persistent: serve frames until the client disconnects
+        while True:
+            try:
+                message = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            texts = [str(t) for t in message.get("texts", [])]
+            req = batcher.submit(texts) if texts else _PendingRequest(texts=[], embeddings=[])
+            if req.error is not None:
+                send_frame(self.request, {"error": req.error})
+            else:
+                send_frame(self.request, {"embeddings": req.embeddings})
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 overflows as soon as a few workers connect at once
+    request_queue_size = settings.embedding_server_backlog
+
+    def __init__(self, socket_path: str, batcher: MicroBatcher):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.batcher = batcher
+        super().__init__(socket_path, _Handler)
+
+
+def serve() -> None:
+    embed_fn = build_local_embedding_function()
+    batcher = MicroBatcher(
+        embed_fn,
+        max_batch_size=settings.embedding_server_max_batch_size,
+        max_wait_ms=settings.embedding_server_max_wait_ms,
+    )
+    batcher.start()
+
+    if settings.embedding_server_metrics_port:
+        start_http_server(settings.embedding_server_metrics_port)
+
+    server = EmbeddingServer(settings.embedding_server_socket, batcher)
+    print("Embedding server listening on", settings.embedding_server_socket)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
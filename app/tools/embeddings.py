@@ -0,0 +1,172 @@
+# app/tools/embeddings.py
+# Embedding backends for doc_store:
+#   - local: SentenceTransformer loaded in this process (default)
+#   - server: RemoteEmbeddingFunction talking to app.tools.embedding_server over a Unix socket
+import json
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Any, List
+
+import numpy as np
+
+from app.config import settings
+
+
+# Load from the local directory we created in the Dockerfile
+model_path = "./model_cache"
+
+if os.path.exists(model_path):
+    embedding_model_name = model_path
+else:
+    # Fallback for local development if not in Docker
+    embedding_model_name = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# CPU inference backends for the same model:
+#   torch     – full-precision PyTorch (baseline)
+#   onnx      – ONNX Runtime export (onnx/model.onnx)
+#   onnx-int8 – dynamically int8-quantized ONNX export
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Model + backend; int8 vectors differ slightly, so caches and the index key on this
+embedding_model_id = f"{embedding_model_name}@{settings.embedding_backend}"
+
+
+# Wire format shared with embedding_server: 4-byte big-endian length + JSON body
+_HEADER = struct.Struct(">I")
+
+
+def send_frame(sock: socket.socket, payload: Any) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            raise ConnectionError("embedding server closed the connection")
+        buf.extend(part)
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Any:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length).decode("utf-8"))
+
+
+class RemoteEmbeddingFunction:
+    """
+    Embedding function (same call signature as Chroma's) backed by the shared embedding server.
+    Each thread keeps its own persistent connection; the server merges
+    concurrent requests from all workers into micro-batches.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        timeout: float = 30.0,
+        connect_retries: int = 5,
+        connect_backoff: float = 0.01,
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connect_retries = connect_retries
+        self.connect_backoff = connect_backoff
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        delay = self.connect_backoff
+        attempt = 0
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+                # Full accept backlog (EAGAIN on a socket with a timeout) or server restarting
+                sock.close()
+                attempt += 1
+                if attempt > self.connect_retries:
+                    raise
+                time.sleep(delay * (1 + random.random()))
+                delay *= 2
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._connect()
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        texts = list(input)
+        if not texts:
+            return []
+
+        # One resend covers a persistent connection the server dropped (e.g. a restart)
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                send_frame(sock, {"texts": texts})
+                reply = recv_frame(sock)
+                break
+            except TimeoutError:
+                # The server has the batch and is only slow; resending it would double its load
+                self._reset()
+                raise
+            except (ConnectionError, OSError):
+                self._reset()
+                if attempt == 1:
+                    raise
+
+        if "error" in reply:
+            raise RuntimeError(f"embedding server error: {reply['error']}")
+        return [np.asarray(e, dtype=np.float32) for e in reply["embeddings"]]
+
+
+def _backend_kwargs(backend: str) -> dict:
+    if backend == "torch":
+        return {}
+    if backend == "onnx":
+        return {"backend": "onnx"}
+    if backend == "onnx-int8":
+        return {
+            "backend": "onnx",
+            "model_kwargs": {"file_name": f"onnx/model_qint8_{settings.embedding_onnx_quantization}.onnx"},
+        }
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+
+
+def build_local_embedding_function(backend: str | None = None):
+    # Imported here: chromadb + sentence-transformers are slow to import and load
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+    return SentenceTransformerEmbeddingFunction(
+        model_name=embedding_model_name,
+        **_backend_kwargs(backend or settings.embedding_backend),
+    )
+
+
+def get_embedding_function():
+    """Pick the embedding backend configured in Settings."""
+    if settings.embedding_server_enabled:
+        return RemoteEmbeddingFunction(
+            settings.embedding_server_socket,
+            timeout=settings.embedding_server_timeout_seconds,
+            connect_retries=settings.embedding_server_connect_retries,
+            connect_backoff=settings.embedding_server_connect_backoff_seconds,
+        )
+    return build_local_embedding_function()
+
@@ -0,0 +1,71 @@
+# app/tools/http_client.py
+# Shared outbound HTTP layer: pooled keep-alive sessions with default timeouts
+# and jittered exponential-backoff retries.
+# Only idempotent methods are retried unless the caller opts POST in (e.g. Tavily
+# search, which is a read-only POST).
+import threading
+from typing import Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import settings
+
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default (connect, read) timeout when the caller gives none."""
+
+    def __init__(self, timeout: Tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def build_session(retry_post: bool = False) -> requests.Session:
+    methods = _IDEMPOTENT_METHODS | {"POST"} if retry_post else _IDEMPOTENT_METHODS
+    retry = Retry(
+        total=settings.http_max_retries,
+        connect=settings.http_max_retries,
+        read=settings.http_max_retries,
+        status=settings.http_max_retries,
+        allowed_methods=methods,
+        status_forcelist=_RETRY_STATUSES,
+        backoff_factor=settings.http_backoff_seconds,
+        backoff_jitter=settings.http_backoff_seconds,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = _TimeoutHTTPAdapter(
+        timeout=(settings.http_connect_timeout_seconds, settings.http_read_timeout_seconds),
+        pool_connections=settings.http_pool_connections,
+        pool_maxsize=settings.http_pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Default session shared by every thread in the process. Clients that set auth
+# headers on their session (Tavily) build their own with build_session().
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
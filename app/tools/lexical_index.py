@@ -0,0 +1,189 @@
+# app/tools/lexical_index.py
+# In-process BM25 index kept next to the research_docs collection.
+# Catches exact tokens (competitor names, SKUs, acronyms) that dense vectors tend to miss.
+import os
+import pickle
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps hyphenated/dotted codes like 'x-200' or 'v2.1' intact."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class BM25Index:
+    """
+    Inverted index with compact postings: per term, two parallel typed arrays
+    (uint32 document ordinals, uint16 term frequencies). Scoring is vectorized
+    with numpy over those arrays, and top-k uses argpartition.
+
+    Documents are addressed by Chroma chunk id. Deletes (and re-adds of an
+    existing id) leave tombstones that are compacted away once they make up a
+    quarter of the index. Per-document length norms are cached between writes.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids: List[str] = []  # ordinal → chunk id
+        self._ordinals: Dict[str, int] = {}  # chunk id → ordinal
+        self._sources: Dict[str, List[int]] = {}  # source file → ordinals
+        self._doc_len = array("I")
+        self._alive = bytearray()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._n_alive = 0
+        self._total_len = 0
+        # (length norm, alive mask) per ordinal; rebuilt on the first search after a write
+        self._scoring: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return self._n_alive
+
+    def add(self, ids: Iterable[str], texts: Iterable[str], sources: Iterable[str]) -> None:
+        with self._lock:
+            for chunk_id, text, source in zip(ids, texts, sources):
+                if chunk_id in self._ordinals:
+                    self._remove_ordinal(self._ordinals[chunk_id])
+
+                ordinal = len(self._ids)
+                self._ids.append(chunk_id)
+                self._ordinals[chunk_id] = ordinal
+                self._sources.setdefault(source, []).append(ordinal)
+
+                counts: Dict[str, int] = {}
+                tokens = tokenize(text)
+                for tok in tokens:
+                    counts[tok] = counts.get(tok, 0) + 1
+                for tok, tf in counts.items():
+                    postings = self._postings.get(tok)
+                    if postings is None:
+                        postings = self._postings[tok] = (array("I"), array("H"))
+                    postings[0].append(ordinal)
+                    postings[1].append(min(tf, 0xFFFF))
+
+                self._doc_len.append(len(tokens))
+                self._alive.append(1)
+                self._n_alive += 1
+                self._total_len += len(tokens)
+            self._written()
+
+    def _remove_ordinal(self, ordinal: int) -> None:
+        if self._alive[ordinal]:
+            self._alive[ordinal] = 0
+            self._n_alive -= 1
+            self._total_len -= self._doc_len[ordinal]
+            del self._ordinals[self._ids[ordinal]]
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for ordinal in self._sources.pop(source, []):
+                self._remove_ordinal(ordinal)
+            self._written()
+
+    def _written(self) -> None:
+        self.dirty = True
+        self._scoring = None
+        if len(self._ids) - self._n_alive > len(self._ids) // 4:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild postings without tombstoned documents."""
+        remap = np.full(len(self._ids), -1, dtype=np.int64)
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        remap[alive] = np.arange(int(alive.sum()))
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for tok, (ords, tfs) in self._postings.items():
+            o = np.frombuffer(ords, dtype=np.uint32)
+            keep = alive[o]
+            if keep.any():
+                postings[tok] = (
+                    array("I", remap[o[keep]].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+                )
+
+        ids = [cid for cid, a in zip(self._ids, self._alive) if a]
+        self._ids = ids
+        self._ordinals = {cid: i for i, cid in enumerate(ids)}
+        self._sources = {
+            src: [int(remap[o]) for o in ords if remap[o] >= 0]
+            for src, ords in self._sources.items()
+        }
+        self._doc_len = array("I", np.frombuffer(self._doc_len, dtype=np.uint32)[alive].tobytes())
+        self._alive = bytearray(b"\x01" * len(ids))
+        self._postings = postings
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, bm25 score), best first."""
+        with self._lock:
+            n_docs = len(self._ids)
+            if self._n_alive == 0 or k <= 0:
+                return []
+
+            if self._scoring is None:
+                doc_len = np.frombuffer(self._doc_len, dtype=np.uint32).astype(np.float32)
+                avgdl = self._total_len / self._n_alive or 1.0
+                norm = self.k1 * (1.0 - self.b + self.b * doc_len / avgdl)
+                alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+                self._scoring = (norm, alive)
+            norm, alive = self._scoring
+            scores = np.zeros(n_docs, dtype=np.float32)
+
+            for tok in set(tokenize(query)):
+                postings = self._postings.get(tok)
+                if postings is None:
+                    continue
+                ords = np.frombuffer(postings[0], dtype=np.uint32)
+                # Tombstoned postings neither score nor count towards df
+                keep = alive[ords]
+                ords = ords[keep]
+                if not len(ords):
+                    continue
+                tfs = np.frombuffer(postings[1], dtype=np.uint16)[keep].astype(np.float32)
+                df = len(ords)
+                idf = np.log(1.0 + (self._n_alive - df + 0.5) / (df + 0.5))
+                scores[ords] += idf * tfs * (self.k1 + 1.0) / (tfs + norm[ords])
+
+            k = min(k, n_docs)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            state = {k: v for k, v in self.__dict__.items() if k not in ("_lock", "_scoring")}
+            state["dirty"] = False
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls()
+        with open(path, "rb") as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Fuse several best-first id lists; each id scores sum(1 / (k + rank))."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,111 @@
+# app/tools/near_dup.py
+# Near-duplicate suppression for retrieved text (overlapping PDF pages, syndicated
+# news copies). Texts are reduced to MinHash signatures over word shingles; an item
+# whose estimated Jaccard similarity to an already kept item reaches the threshold
+# is dropped. Inputs are best-first, so the highest-ranked copy survives.
+import re
+import zlib
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+# Mersenne prime 2^31 - 1: a * h + b stays below 2^63 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+NEAR_DUP_DROPPED = Counter(
+    "research_near_duplicates_dropped_total",
+    "Retrieved items dropped as near-duplicates",
+    ["kind"],  # web_results / doc_chunks
+)
+
+# Observed once per draft (web results and doc chunks combined) by report generation
+NEAR_DUP_BYTES_SAVED = Histogram(
+    "research_near_duplicate_bytes_saved",
+    "Serialized bytes removed from one draft by near-duplicate suppression",
+    buckets=(0, 256, 1024, 4096, 16384, 65536, 262144),
+)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+
+
+@lru_cache(maxsize=4)
+def _permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(text: str, num_perm: int, shingle_size: int) -> np.ndarray:
+    """MinHash signature of the text's word shingles (all-max for empty text)."""
+    a, b = _permutations(num_perm)
+    grams = shingles(text, shingle_size)
+    if not grams:
+        return np.full(num_perm, _PRIME, dtype=np.uint64)
+    # crc32 is stable across processes, unlike hash()
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    return ((a[:, None] * hashes[None, :] + b[:, None]) % _PRIME).min(axis=1)
+
+
+def kept_indices(
+    texts: Sequence[str],
+    threshold: float,
+    num_perm: int,
+    shingle_size: int,
+) -> List[int]:
+    """Indices of the texts to keep, in order; later near-duplicates of earlier ones are dropped."""
+    kept: List[int] = []
+    signatures: List[np.ndarray] = []
+    for i, text in enumerate(texts):
+        if not text.strip():
+            kept.append(i)
+            continue
+        signature = minhash(text, num_perm, shingle_size)
+        if signatures:
+            similarity = (np.vstack(signatures) == signature).mean(axis=1)
+            if similarity.max() >= threshold:
+                continue
+        kept.append(i)
+        signatures.append(signature)
+    return kept
+
+
+def suppress_near_duplicates(
+    items: List[T],
+    text: Callable[[T], str],
+    kind: str,
+    limit: Optional[int] = None,
+) -> Tuple[List[T], int]:
+    """
+    Drop near-duplicate items (per settings); returns (kept items, serialized bytes dropped).
+    When the caller will keep only the first limit items, only drops among the first limit
+    count as bytes saved: anything past it would have been cut anyway.
+    """
+    if not settings.near_dup_enabled or len(items) < 2:
+        return items, 0
+
+    keep = set(kept_indices(
+        [text(item) for item in items],
+        threshold=settings.near_dup_threshold,
+        num_perm=settings.near_dup_num_perm,
+        shingle_size=settings.near_dup_shingle_size,
+    ))
+    dropped = [item for i, item in enumerate(items) if i not in keep]
+
+    NEAR_DUP_DROPPED.labels(kind=kind).inc(len(dropped))
+    saved = sum(
+        len(item.model_dump_json().encode("utf-8"))
+        for i, item in enumerate(items[:limit])
+        if i not in keep
+    )
+    return [item for i, item in enumerate(items) if i in keep], saved
@@ -0,0 +1,24 @@
+# app/tools/pdf_extract.py
+# Lightweight PDF text extraction used by the indexing pipeline.
+# Kept free of Chroma / model imports so process-pool workers stay cheap.
+from typing import List, Tuple
+
+from pypdf import PdfReader
+
+
+def count_pages(local_path: str) -> int:
+    return len(PdfReader(local_path).pages)
+
+
+def extract_page_range(local_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Return (page_index, text) for non-empty pages in [start, stop)."""
+    reader = PdfReader(local_path)
+    pages: List[Tuple[int, str]] = []
+
+    for i in range(start, min(stop, len(reader.pages))):
+        text = reader.pages[i].extract_text() or ""
+        text = text.strip()
+        if text:
+            pages.append((i, text))
+
+    return pages
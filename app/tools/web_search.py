@@ -32,33 +32,145 @@
 
 
 # app/tools/web_search.py
-from typing import List
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Optional
 
+from prometheus_client import Counter
 from tavily import TavilyClient
 
+from app.cache import SQLiteCache, TTLCache, make_key, normalize_text
 from app.config import settings
 from app.models import WebSearchResult
+from app.telemetry import timed_tool
+from app.tools import web_warehouse
+from app.tools.http_client import build_session
 
 
-# Initialize Tavily client once
-_tavily_client = TavilyClient(api_key=settings.tavily_api_key)
+# Tavily client is created once, on first use
+_tavily_client: TavilyClient | None = None
+_tavily_lock = threading.Lock()
 
 
-def web_search(query: str, max_results: int = 5) -> List[WebSearchResult]:
+def _get_tavily_client() -> TavilyClient:
+    global _tavily_client
+    if _tavily_client is None:
+        with _tavily_lock:
+            if _tavily_client is None:
+                # Own pooled session: Tavily sets its auth headers on it. Search is a
+                # read-only POST, so it is safe to retry.
+                _tavily_client = TavilyClient(
+                    api_key=settings.tavily_api_key,
+                    session=build_session(retry_post=True),
+                )
+    return _tavily_client
+
+
+WEB_CACHE_HITS = Counter(
+    "web_search_cache_hits_total",
+    "Tavily searches answered from cache",
+    ["tier"],
+)
+
+WEB_CACHE_MISSES = Counter(
+    "web_search_cache_misses_total",
+    "Tavily searches that went to the live API",
+)
+
+WEB_CACHE_EVICTIONS = Counter(
+    "web_search_cache_evictions_total",
+    "Entries evicted from the in-process Tavily cache",
+    ["reason"],
+)
+
+# Two-tier cache: per-process LRU, backed by a SQLite file shared across workers
+_memory_cache = TTLCache(
+    max_entries=settings.web_cache_max_entries,
+    ttl_seconds=settings.web_cache_ttl_seconds,
+    on_evict=lambda reason: WEB_CACHE_EVICTIONS.labels(reason=reason).inc(),
+)
+_disk_cache = (
+    SQLiteCache(settings.web_cache_path, ttl_seconds=settings.web_cache_ttl_seconds, table="web_search")
+    if settings.web_cache_enabled
+    else None
+)
+
+
+def _cache_key(query: str, max_results: int, search_depth: str) -> str:
+    return make_key(normalize_text(query), max_results, search_depth)
+
+
+def _cached_results(key: str) -> List[WebSearchResult] | None:
+    rows = _memory_cache.get(key)
+    if rows is not None:
+        WEB_CACHE_HITS.labels(tier="memory").inc()
+        return [WebSearchResult(**r) for r in rows]
+
+    if _disk_cache is not None:
+        rows = _disk_cache.get(key)
+        if rows is not None:
+            WEB_CACHE_HITS.labels(tier="disk").inc()
+            _memory_cache.set(key, rows)
+            return [WebSearchResult(**r) for r in rows]
+
+    return None
+
+
+def _store_results(key: str, results: List[WebSearchResult]) -> None:
+    rows = [r.model_dump() for r in results]
+    _memory_cache.set(key, rows)
+    if _disk_cache is not None:
+        _disk_cache.set(key, rows)
+
+
+def web_search(
+    query: str,
+    max_results: int = 5,
+    search_depth: str = "basic",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+) -> List[WebSearchResult]:
     """
     Runs a Tavily web search and returns normalized WebSearchResult objects.
     Uses tavily-python directly instead of LangChain's TavilySearchResults tool.
+
+    Results are cached by (normalized query, max_results, search_depth), and every
+    live result is kept in the web warehouse, which can answer related queries;
+    pass use_cache=False to force a live search (the fresh result is still stored).
+    timeout caps the Tavily call (default: http_read_timeout_seconds).
     """
+    use_warehouse = use_cache and settings.web_warehouse_enabled
+    use_cache = use_cache and settings.web_cache_enabled
+    key = _cache_key(query, max_results, search_depth)
+
+    if use_cache:
+        cached = _cached_results(key)
+        if cached is not None:
+            return cached
+        WEB_CACHE_MISSES.inc()
+
+    # Related queries: answer from pages fetched earlier if they are fresh and relevant enough
+    if use_warehouse:
+        stored = web_warehouse.lookup(query, max_results)
+        if stored is not None:
+            # A hit may carry fewer than max_results; caching that under the exact key would
+            # pin the short list for the whole cache TTL, so only full answers are cached
+            if settings.web_cache_enabled and len(stored) >= max_results:
+                _store_results(key, stored)
+            return stored
 
     # Tavily search API:
     # https://docs.tavily.com/docs/tavily-api/search
     # Typical response: {"results": [ { "title": ..., "url": ..., "content": ... }, ... ] }
-    res = _tavily_client.search(
-        query=query,
-        max_results=max_results,
-        search_depth="basic",  # or "advanced" if you like
-        include_answer=False,  # we only want raw results, we'll do our own summarization
-    )
+    with timed_tool("tavily", "search", max_results=max_results, search_depth=search_depth):
+        res = _get_tavily_client().search(
+            query=query,
+            max_results=max_results,
+            search_depth=search_depth,  # "basic" or "advanced"
+            include_answer=False,  # we only want raw results, we'll do our own summarization
+            timeout=timeout if timeout is not None else settings.http_read_timeout_seconds,
+        )
 
     raw_results = res.get("results", []) or []
 
@@ -72,4 +184,77 @@ def web_search(query: str, max_results: int = 5) -> List[WebSearchResult]:
             )
         )
 
+    if settings.web_cache_enabled:
+        _store_results(key, results)
+    if settings.web_warehouse_enabled:
+        # Embedding + upsert would eat into the request's retrieval deadline
+        web_warehouse.store_async(results)
+
+    return results
+
+
+# One pool shared by every request, so fan-out never puts more than
+# web_search_max_concurrency Tavily calls in flight at once
+_search_pool = ThreadPoolExecutor(
+    max_workers=settings.web_search_max_concurrency,
+    thread_name_prefix="tavily",
+)
+
+
+def submit_web_search(
+    query: str,
+    max_results: int = 5,
+    search_depth: str = "basic",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+) -> Future:
+    """Start web_search on the shared pool; the future resolves to its results."""
+    # copy_context keeps trace spans nested under the calling graph node
+    return _search_pool.submit(
+        contextvars.copy_context().run,
+        web_search, query, max_results, search_depth, use_cache, timeout,
+    )
+
+
+def collect_web_searches(
+    queries: List[str],
+    futures: List[Future],
+    timeout: Optional[float] = None,
+) -> List[Optional[List[WebSearchResult]]]:
+    """
+    Wait up to timeout seconds for submitted searches; results come back in query order.
+    A query that failed, or is still running when the wait ends, yields None.
+    """
+    if timeout is None or timeout > 0:
+        wait(futures, timeout=timeout)
+
+    results: List[Optional[List[WebSearchResult]]] = []
+    for query, future in zip(queries, futures):
+        if not future.done():
+            # Left to finish in the background; its own Tavily timeout bounds it
+            print(f"Web search timed out after {timeout}s: {query!r}")
+            results.append(None)
+        elif future.exception() is not None:
+            print(f"Web search failed for {query!r}: {future.exception()}")
+            results.append(None)
+        else:
+            results.append(future.result())
     return results
+
+
+def web_search_many(
+    queries: List[str],
+    max_results: int = 5,
+    search_depth: str = "basic",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+) -> List[Optional[List[WebSearchResult]]]:
+    """
+    Run web_search for several queries concurrently; results come back in query order.
+    A query that fails, or is still running after timeout seconds, yields None.
+    """
+    if timeout is not None and timeout <= 0:
+        return [None for _ in queries]
+
+    futures = [submit_web_search(q, max_results, search_depth, use_cache, timeout) for q in queries]
+    return collect_web_searches(queries, futures, timeout)
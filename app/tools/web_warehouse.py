@@ -0,0 +1,176 @@
+# app/tools/web_warehouse.py
+# Local warehouse of every web result Tavily has returned, in its own Chroma
+# collection next to research_docs. Results are keyed by canonical URL (re-fetches
+# update the snippet and fetch time) and embedded as title + snippet, so related
+# follow-up queries can be answered from pages fetched earlier.
+# A lookup is a hit only if enough fresh results clear the similarity threshold;
+# otherwise web_search falls through to a live Tavily call. Live results are written
+# back on a background thread, off the request's deadline. Pages past the retention
+# period are pruned, so the collection doesn't grow without bound.
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from prometheus_client import Counter, Gauge
+
+from app.config import settings
+from app.models import WebSearchResult
+from app.tools import doc_store
+from app.tools.embeddings import embedding_model_id
+
+
+WAREHOUSE_LOOKUPS = Counter(
+    "web_warehouse_lookups_total",
+    "Web warehouse lookups",
+    # hit: answered locally; miss: not enough fresh, relevant pages; error: lookup failed
+    ["result"],
+)
+
+WAREHOUSE_HIT_RATIO = Gauge(
+    "web_warehouse_hit_ratio",
+    "Share of warehouse lookups answered without a live search (since process start)",
+)
+
+WAREHOUSE_STORED = Counter(
+    "web_warehouse_results_stored_total",
+    "Web results written (inserted or refreshed) to the warehouse",
+)
+
+WAREHOUSE_PRUNED = Counter(
+    "web_warehouse_results_pruned_total",
+    "Web results deleted from the warehouse for being past retention",
+)
+
+_TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref"}
+
+_collection = None
+_lock = threading.Lock()
+_lookups = 0
+_hits = 0
+_last_prune = 0.0
+
+
+def canonical_url(url: str) -> str:
+    """Lowercase scheme/host, drop fragment, tracking params and trailing slash, sort the query."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith("utm_") or k.lower() in _TRACKING_PARAMS)
+    )
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    return urlunsplit((parts.scheme.lower() or "https", netloc, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def _get_collection():
+    global _collection
+    if _collection is None:
+        with _lock:
+            if _collection is None:
+                _collection = doc_store.get_chroma_client().get_or_create_collection(
+                    name="web_results",
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=None,
+                )
+    return _collection
+
+
+def _record(result: str) -> None:
+    global _lookups, _hits
+    WAREHOUSE_LOOKUPS.labels(result=result).inc()
+    with _lock:
+        _lookups += 1
+        _hits += result == "hit"
+        WAREHOUSE_HIT_RATIO.set(_hits / _lookups)
+
+
+def prune(now: Optional[float] = None) -> int:
+    """Delete pages fetched longer than web_warehouse_retention_seconds ago; returns how many."""
+    cutoff = (now or time.time()) - settings.web_warehouse_retention_seconds
+    collection = _get_collection()
+    expired = collection.get(where={"fetched_at": {"$lt": cutoff}}, include=[])["ids"]
+    if expired:
+        collection.delete(ids=expired)
+        WAREHOUSE_PRUNED.inc(len(expired))
+    return len(expired)
+
+
+def _prune_if_due(now: float) -> None:
+    global _last_prune
+    with _lock:
+        if now - _last_prune < settings.web_warehouse_prune_interval_seconds:
+            return
+        _last_prune = now
+    prune(now)
+
+
+def store(results: List[WebSearchResult]) -> None:
+    """Upsert results by canonical URL with the current fetch time, pruning old pages when due."""
+    unique = {canonical_url(r.url): r for r in results}
+    if not unique:
+        return
+    try:
+        now = time.time()
+        _prune_if_due(now)
+        _get_collection().upsert(
+            ids=[hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] for url in unique],
+            embeddings=doc_store.embed_documents([f"{r.title}\n{r.snippet}" for r in unique.values()]),
+            documents=[r.snippet for r in unique.values()],
+            metadatas=[
+                {"url": r.url, "canonical_url": url, "title": r.title, "fetched_at": now, "model": embedding_model_id}
+                for url, r in unique.items()
+            ],
+        )
+        WAREHOUSE_STORED.inc(len(unique))
+    except Exception as e:
+        print("Web warehouse store failed:", e)
+
+
+# One writer: embedding + upsert of live results happens here, not on the request thread
+_store_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warehouse-store")
+
+
+def store_async(results: List[WebSearchResult]) -> Future:
+    """Queue store(results) on the background writer."""
+    return _store_pool.submit(store, list(results))
+
+
+def lookup(query: str, max_results: int) -> Optional[List[WebSearchResult]]:
+    """
+    Fresh, relevant stored results for the query, or None if local coverage is too thin.
+    Coverage = results with similarity >= web_warehouse_min_similarity that were fetched
+    within web_warehouse_max_age_seconds; it must reach web_warehouse_min_coverage * max_results.
+    """
+    cutoff = time.time() - settings.web_warehouse_max_age_seconds
+    try:
+        embedding = doc_store.embed_query(query)
+        # Freshness is filtered inside the query, so old pages can't crowd fresh ones out of the top k
+        res = _get_collection().query(
+            query_embeddings=[embedding],
+            n_results=max_results,
+            where={"$and": [{"model": embedding_model_id}, {"fetched_at": {"$gte": cutoff}}]},
+            include=["documents", "metadatas", "distances"],
+        )
+        fresh = _relevant(res)
+        if len(fresh) < settings.web_warehouse_min_coverage * max_results:
+            _record("miss")
+            return None
+    except Exception as e:
+        print("Web warehouse lookup failed:", e)
+        _record("error")
+        return None
+
+    _record("hit")
+    return [WebSearchResult(title=meta["title"], url=meta["url"], snippet=snippet) for snippet, meta in fresh]
+
+
+def _relevant(res: dict) -> List[Tuple[str, dict]]:
+    return [
+        (snippet, meta)
+        for snippet, meta, distance in zip(res["documents"][0], res["metadatas"][0], res["distances"][0])
+        if 1.0 - distance >= settings.web_warehouse_min_similarity
+    ]
@@ -115,13 +115,21 @@
 
 # app/ui/gradio_app.py
 
-import requests
+import json
+import time
+
 import gradio as gr
 from pydantic import ValidationError
 from app.config import settings
-from app.models import ResearchRequest, ReportFeedback
+from app.models import ResearchRequest, ReportFeedback, ResearchState, WebSearchResult, DocumentChunk
+from app.report.generator import generate_draft_report
+from app.agent.synthesis import parse_sections
+from app.tools.http_client import get_session
 
 API_BASE = settings.api_base 
+# Drafts may take up to the server's research deadline; leave headroom on top of it
+DRAFT_TIMEOUT = (settings.http_connect_timeout_seconds, settings.research_deadline_seconds + 10)
+PARTIAL_NOTE = "⚠️ Partial draft: some sources timed out ({})."
 
 
 def call_create_draft(query, industry, competitors_csv):
@@ -139,15 +147,108 @@ def call_create_draft(query, industry, competitors_csv):
     except ValidationError as e:
         return None, f"Validation error: {e}", ""
 
-    resp = requests.post(f"{API_BASE}/api/research/draft", json=req.model_dump())
+    resp = get_session().post(f"{API_BASE}/api/research/draft", json=req.model_dump(), timeout=DRAFT_TIMEOUT)
     if resp.status_code != 200:
         return None, f"Error from API: {resp.text}", ""
 
     draft = resp.json()
     draft_id = draft["id"]
     draft_markdown = draft["draft_markdown"]
+    status = PARTIAL_NOTE.format(", ".join(draft["partial_sources"])) if draft.get("partial") else ""
     # We only return the draft to fill the editable box
-    return draft_id, "", draft_markdown
+    return draft_id, status, draft_markdown
+
+
+def _iter_sse(resp):
+    """Parse a text/event-stream response into (event, data) pairs."""
+    event, data_lines = "message", []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+_STAGE_LABELS = {
+    "web_search": "Web results received",
+    "doc_search": "Internal documents received",
+    "synthesis": "Summary written",
+    "report_generation": "Draft assembled",
+}
+
+
+def stream_create_draft(query, industry, competitors_csv):
+    """
+    Call the streaming draft endpoint and yield (draft_id, status, markdown)
+    every time a graph node finishes, so sections show up as they arrive.
+    """
+    competitors = (
+        [c.strip() for c in competitors_csv.split(",") if c.strip()]
+        if competitors_csv
+        else []
+    )
+    try:
+        req = ResearchRequest(
+            query=query,
+            industry=industry or None,
+            competitors=competitors or None,
+        )
+    except ValidationError as e:
+        yield None, f"Validation error: {e}", ""
+        return
+
+    resp = get_session().post(
+        f"{API_BASE}/api/research/draft/stream", json=req.model_dump(), stream=True, timeout=DRAFT_TIMEOUT
+    )
+    if resp.status_code != 200:
+        yield None, f"Error from API: {resp.text}", ""
+        return
+
+    # Preview uses the same template as the server, filled with what has arrived so far
+    preview = ResearchState(query=req.query, industry=req.industry, competitors=competitors)
+    done = []
+    synthesis_text, last_render = "", 0.0
+    yield None, "⏳ Researching...", ""
+
+    for event, data in _iter_sse(resp):
+        if event == "error":
+            yield None, f"Error from API: {data.get('details')}", ""
+            return
+        if event == "draft":
+            status = PARTIAL_NOTE.format(", ".join(data["partial_sources"])) if data.get("partial") else ""
+            yield data["id"], status, data["draft_markdown"]
+            return
+
+        if event == "token":
+            # Re-render at most every 100ms while the summary streams in
+            synthesis_text += data["token"]
+            if time.monotonic() - last_render >= 0.1:
+                last_render = time.monotonic()
+                preview.synthesis = parse_sections(synthesis_text)
+                yield None, "⏳ Writing summary...", generate_draft_report(preview.model_copy(deep=True)).draft_markdown
+            continue
+
+        if "web_results" in data:
+            preview.web_results = [WebSearchResult(**r) for r in data["web_results"]]
+        if "doc_chunks" in data:
+            preview.doc_chunks = [DocumentChunk(**c) for c in data["doc_chunks"]]
+        if "synthesis" in data:
+            preview.synthesis = data["synthesis"]
+        if "partial_sources" in data:
+            preview.partial_sources = preview.partial_sources + data["partial_sources"]
+        done.append(_STAGE_LABELS.get(event, event))
+        status = "⏳ " + " · ".join(done) + "..."
+
+        if data.get("draft_markdown"):
+            yield None, status, data["draft_markdown"]
+        else:
+            yield None, status, generate_draft_report(preview.model_copy(deep=True)).draft_markdown
 
 
 def call_finalize(draft_id, edited_markdown, score, comments):
@@ -161,7 +262,7 @@ def call_finalize(draft_id, edited_markdown, score, comments):
     except ValidationError as e:
         return f"Validation error: {e}", ""
 
-    resp = requests.post(f"{API_BASE}/api/research/finalize", json=fb.model_dump())
+    resp = get_session().post(f"{API_BASE}/api/research/finalize", json=fb.model_dump())
     if resp.status_code != 200:
         return f"Error from API: {resp.text}", ""
 
@@ -204,9 +305,9 @@ def build_interface():
         final_report = gr.Markdown(label="Final Report", value="")
 
         def on_generate(query, industry, competitors):
-            did, err, draft_md = call_create_draft(query, industry, competitors)
-            # We only fill the editable box; no preview Markdown
-            return did, err or "", draft_md
+            # Stream partial drafts into the editable box as each stage finishes
+            for did, err, draft_md in stream_create_draft(query, industry, competitors):
+                yield did, err or "", draft_md
 
         gen_btn = gr.Button("Generate Draft Report")
         gen_btn.click(
@@ -0,0 +1,142 @@
+# benchmarks/embedding_backends.py
+# Compare embedding backends (torch / onnx / onnx-int8) on CPU.
+#
+#   python -m benchmarks.embedding_backends --docs 500 --queries 100
+#
+# Each backend runs in its own subprocess so RSS is measured in isolation.
+# Reports embeddings/sec (batched documents), p50/p99 single-query latency,
+# peak RSS, and recall@k of each backend's neighbours against the torch baseline.
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.tools.embeddings import EMBEDDING_BACKENDS
+
+
+def _corpus(folder: str, n_docs: int, n_queries: int, seed: int) -> Dict[str, List[str]]:
+    """Chunk the local PDFs the same way indexing does; queries are word windows from chunks."""
+    from app.tools.chunking import chunk_page
+    from app.tools.pdf_extract import count_pages, extract_page_range
+
+    texts: List[str] = []
+    for file in sorted(os.listdir(folder)):
+        if file.lower().endswith(".pdf"):
+            path = os.path.join(folder, file)
+            for _, page_text in extract_page_range(path, 0, count_pages(path)):
+                texts.extend(chunk for _, chunk in chunk_page(page_text))
+
+    rng = random.Random(seed)
+    docs = [texts[i % len(texts)] for i in range(n_docs)]
+    queries = []
+    for _ in range(n_queries):
+        words = rng.choice(texts).split()
+        start = rng.randrange(0, max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + 8]))
+    return {"docs": docs, "queries": queries}
+
+
+def _worker(backend: str, corpus_path: str, out_path: str, batch_size: int) -> None:
+    from app.tools.embeddings import build_local_embedding_function
+
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    started = time.perf_counter()
+    embed = build_local_embedding_function(backend)
+    load_seconds = time.perf_counter() - started
+
+    embed(corpus["queries"][:2])  # warm-up
+
+    started = time.perf_counter()
+    doc_vectors = []
+    for i in range(0, len(corpus["docs"]), batch_size):
+        doc_vectors.extend(embed(corpus["docs"][i:i + batch_size]))
+    doc_seconds = time.perf_counter() - started
+
+    latencies = []
+    query_vectors = []
+    for query in corpus["queries"]:
+        t0 = time.perf_counter()
+        query_vectors.extend(embed([query]))
+        latencies.append(time.perf_counter() - t0)
+
+    np.savez(out_path, docs=np.asarray(doc_vectors), queries=np.asarray(query_vectors))
+    ms = np.array(latencies) * 1000
+    print(json.dumps({
+        "load_seconds": round(load_seconds, 3),
+        "embeddings_per_second": round(len(corpus["docs"]) / doc_seconds, 1),
+        "query_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "query_p99_ms": round(float(np.percentile(ms, 99)), 3),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def _top_k(queries: np.ndarray, docs: np.ndarray, k: int) -> np.ndarray:
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    d = docs / np.linalg.norm(docs, axis=1, keepdims=True)
+    return np.argsort(-(q @ d.T), axis=1)[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--folder", default="data/documents")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.corpus, args.out, args.batch_size)
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = os.path.join(tmp, "corpus.json")
+        with open(corpus_path, "w", encoding="utf-8") as f:
+            json.dump(_corpus(args.folder, args.docs, args.queries, args.seed), f)
+
+        vectors = {}
+        for backend in backends:
+            out_path = os.path.join(tmp, f"{backend}.npz")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.embedding_backends",
+                 "--worker", backend, "--corpus", corpus_path, "--out", out_path,
+                 "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                results[backend] = {"error": proc.stderr.strip().splitlines()[-1:]}
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out_path)
+
+        # Recall of each backend's top-k neighbours against the full-precision baseline
+        if "torch" in vectors:
+            baseline = _top_k(vectors["torch"]["queries"], vectors["torch"]["docs"], args.k)
+            for backend, v in vectors.items():
+                top = _top_k(v["queries"], v["docs"], args.k)
+                overlap = [len(set(a) & set(b)) / args.k for a, b in zip(top, baseline)]
+                results[backend][f"recall@{args.k}_vs_torch"] = round(float(np.mean(overlap)), 4)
+
+    print(json.dumps({"docs": args.docs, "queries": args.queries, "backends": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
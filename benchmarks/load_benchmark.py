@@ -0,0 +1,278 @@
+# benchmarks/load_benchmark.py
+# Offline load test of the full draft pipeline (Flask -> graph -> doc_store).
+#
+#   python -m benchmarks.load_benchmark --docs 20 --pages 10 --concurrency 1,4,16 --requests 64
+#
+# Tavily and Gemini are replaced by local fakes with configurable latency, so no
+# API keys or network are needed. A synthetic PDF corpus is generated and indexed
+# into a throwaway Chroma dir, then /api/research/draft is driven over real HTTP
+# at each concurrency level. Reports throughput, p50/p95/p99 latency and
+# per-stage timings (from DraftReport.timings) as JSON.
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+_WORDS = (
+    "battery lithium supply chain market share revenue growth margin pricing "
+    "competitor regulation demand forecast capacity factory cathode anode cell "
+    "module vehicle grid storage recycling cost subsidy tariff export import "
+    "customer segment strategy partnership investment research patent attention "
+    "transformer model inference latency throughput benchmark dataset training"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(path: str, pages: List[List[str]]) -> None:
+    """Minimal text-only PDF (Helvetica, one Tj per line) that pypdf can extract."""
+    objects: List[bytes] = []
+    n_pages = len(pages)
+    # 1: catalog, 2: pages, 3: font, then (page, content) pairs
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, lines in enumerate(pages):
+        body = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def build_corpus(folder: str, docs: int, pages: int, lines_per_page: int, seed: int) -> None:
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for d in range(docs):
+        content = [
+            [" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+            for _ in range(pages)
+        ]
+        _write_pdf(os.path.join(folder, f"synthetic_{d:04d}.pdf"), content)
+
+
+# ---------------------------------------------------------------------------
+# Fakes for external services
+# ---------------------------------------------------------------------------
+
+def _sleep_ms(mean_ms: float, jitter: float) -> None:
+    if mean_ms > 0:
+        time.sleep(max(0.0, random.gauss(mean_ms, mean_ms * jitter)) / 1000)
+
+
+class FakeTavilyClient:
+    """Stands in for TavilyClient.search with a fixed latency."""
+
+    def __init__(self, latency_ms: float, jitter: float):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        _sleep_ms(self.latency_ms, self.jitter)
+        return {
+            "results": [
+                {
+                    "title": f"{query} - result {i}",
+                    "url": f"https://example.com/{abs(hash(query)) % 10_000}/{i}",
+                    "content": f"Synthetic web content about {query}. " * 8,
+                }
+                for i in range(max_results)
+            ]
+        }
+
+
+class FakeChatModel:
+    """Stands in for ChatGoogleGenerativeAI.invoke / .stream with a fixed latency."""
+
+    def __init__(self, latency_ms: float, jitter: float):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    def _answer(self, messages) -> str:
+        return "Synthetic summary: " + " ".join(random.choice(_WORDS) for _ in range(120))
+
+    def invoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        _sleep_ms(self.latency_ms, self.jitter)
+        return AIMessage(content=self._answer(messages))
+
+    def stream(self, messages, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+
+        _sleep_ms(self.latency_ms, self.jitter)
+        for word in self._answer(messages).split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def _post(url: str, body: dict, no_cache: bool, timeout: float) -> Dict:
+    headers = {"Content-Type": "application/json"}
+    if no_cache:
+        headers["Cache-Control"] = "no-cache"
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = json.loads(resp.read())
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        payload, status = {}, e.code
+    except (urllib.error.URLError, OSError):
+        payload, status = {}, 0
+    return {"status": status, "seconds": time.perf_counter() - started, "timings": payload.get("timings", {})}
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ms = np.array(values) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+def run_level(url: str, concurrency: int, n_requests: int, no_cache: bool, timeout: float, seed: int) -> Dict:
+    rng = random.Random(seed + concurrency)
+    bodies = [
+        {"query": " ".join(rng.choice(_WORDS) for _ in range(4)), "industry": "energy"}
+        for _ in range(n_requests)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda b: _post(url, b, no_cache, timeout), bodies))
+    wall = time.perf_counter() - started
+
+    ok = [r for r in results if r["status"] == 200]
+    stages: Dict[str, List[float]] = {}
+    for r in ok:
+        for stage, seconds in r["timings"].items():
+            stages.setdefault(stage, []).append(seconds)
+
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "ok": len(ok),
+        "errors": n_requests - len(ok),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 3) if wall else None,
+        "latency": _percentiles([r["seconds"] for r in ok]),
+        "stages": {stage: _percentiles(values) for stage, values in sorted(stages.items())},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load benchmark for /api/research/draft")
+    parser.add_argument("--docs", type=int, default=20, help="synthetic PDFs to generate")
+    parser.add_argument("--pages", type=int, default=10, help="pages per PDF")
+    parser.add_argument("--lines-per-page", type=int, default=40)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=64, help="requests per level")
+    parser.add_argument("--tavily-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency stddev as a fraction of the mean")
+    parser.add_argument("--allow-cache", action="store_true", help="don't send Cache-Control: no-cache")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--workdir", help="keep corpus / index here instead of a temp dir")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="research-bench-")
+    corpus = os.path.join(workdir, "documents")
+
+    # Settings are read at import time, so point everything at the work dir first
+    os.environ.update(
+        CHROMA_PERSIST_DIR=os.path.join(workdir, "chroma"),
+        WEB_CACHE_PATH=os.path.join(workdir, "web_search.sqlite3"),
+        DRAFT_STORE_PATH=os.path.join(workdir, "drafts.sqlite3"),
+        TRACE_FILE="",
+    )
+    for key in ("GEMINI_API_KEY", "GEMINI_MODEL_NAME", "TAVILY_API_KEY"):
+        os.environ.setdefault(key, "offline")
+    os.environ.setdefault("API_BASE", f"http://127.0.0.1:{args.port}")
+
+    started = time.perf_counter()
+    build_corpus(corpus, args.docs, args.pages, args.lines_per_page, args.seed)
+    corpus_seconds = time.perf_counter() - started
+
+    import app.agent.graph as graph
+    import app.api.flask as api
+    from app.tools import web_search
+    from werkzeug.serving import make_server
+
+    web_search._tavily_client = FakeTavilyClient(args.tavily_latency_ms, args.jitter)
+    graph.llm = FakeChatModel(args.llm_latency_ms, args.jitter)
+    api.DOCUMENT_FOLDER = corpus
+
+    started = time.perf_counter()
+    api.warm_up()
+    index_seconds = time.perf_counter() - started
+
+    server = make_server("127.0.0.1", args.port, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    url = f"http://127.0.0.1:{args.port}/api/research/draft"
+
+    try:
+        levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        results = [
+            run_level(url, c, args.requests, not args.allow_cache, args.timeout, args.seed)
+            for c in levels
+        ]
+    finally:
+        server.shutdown()
+
+    report = {
+        "corpus": {"docs": args.docs, "pages_per_doc": args.pages, "workdir": workdir},
+        "fakes": {"tavily_latency_ms": args.tavily_latency_ms, "llm_latency_ms": args.llm_latency_ms},
+        "setup_seconds": {"corpus": round(corpus_seconds, 3), "index": round(index_seconds, 3)},
+        "levels": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    # Non-zero exit if anything failed, so CI can gate on it
+    sys.exit(1 if any(level["errors"] for level in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/response_benchmark.py
+# Bytes and serialization time per /api/research/draft response mode.
+#
+#   python -m benchmarks.response_benchmark --web 10 --chunks 50 --runs 200
+#
+# A synthetic DraftReport (full-size chunk texts) is serialized the old way
+# (model_dump + jsonify) and through the new path (model_dump_json) with each
+# projection, then compressed with gzip and, if installed, brotli.
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict
+
+from app.models import DocumentChunk, DraftReport, WebSearchResult
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+_WORDS = "battery market lithium supply revenue growth competitor pricing demand capacity cell grid".split()
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)[:chars]
+
+
+def _draft(n_web: int, n_chunks: int, seed: int) -> DraftReport:
+    rng = random.Random(seed)
+    web = [
+        WebSearchResult(title=_text(rng, 60), url=f"https://example.com/{i}", snippet=_text(rng, 500))
+        for i in range(n_web)
+    ]
+    chunks = [
+        DocumentChunk(
+            doc_id=f"{i // 10:032x}", source=f"report_{i // 10}.pdf", page=i % 10,
+            text=_text(rng, 2000), chunk_id=f"{i // 10:032x}_page_{i % 10}_chunk_0", start_offset=0,
+        )
+        for i in range(n_chunks)
+    ]
+    markdown = "\n\n".join([r.snippet for r in web] + [c.text[:500] for c in chunks])
+    return DraftReport(
+        id="bench", query="battery market", draft_markdown=markdown,
+        web_results=web, doc_chunks=chunks,
+        citations=[r.url for r in web], timings={"total": 1.0},
+    )
+
+
+def _time_ms(fn: Callable[[], bytes], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Draft response size / serialization benchmark")
+    parser.add_argument("--web", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    from app.api.flask import app
+
+    draft = _draft(args.web, args.chunks, args.seed)
+    modes: Dict[str, Callable[[], bytes]] = {
+        "full_jsonify": lambda: app.json.response(draft.model_dump(mode="json")).get_data(),
+        "full": lambda: draft.model_dump_json().encode(),
+        "chunk_refs": lambda: draft.model_dump_json(exclude={"doc_chunks": {"__all__": {"text"}}}).encode(),
+        "fields_id_markdown": lambda: draft.model_dump_json(include={"id", "draft_markdown"}).encode(),
+    }
+
+    results = {}
+    with app.app_context():
+        for name, serialize in modes.items():
+            body = serialize()
+            row = {
+                "bytes": len(body),
+                "serialize_ms": _time_ms(serialize, args.runs),
+                "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+                "gzip_ms": _time_ms(lambda: gzip.compress(body, compresslevel=6), args.runs),
+            }
+            if brotli is not None:
+                row["br_bytes"] = len(brotli.compress(body, quality=4))
+                row["br_ms"] = _time_ms(lambda: brotli.compress(body, quality=4), args.runs)
+            results[name] = row
+
+    print(json.dumps({"web_results": args.web, "doc_chunks": args.chunks, "modes": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/retrieval_benchmark.py
+# Compare dense-only vs hybrid (dense + BM25, RRF) retrieval on the indexed corpus.
+#
+#   python -m benchmarks.retrieval_benchmark --queries 200 --k 5
+#
+# Queries are sampled from indexed chunks: a short window of words taken from a
+# chunk, whose source chunk is the single relevant hit. Reports recall@k,
+# latency percentiles and returned text bytes per mode as JSON.
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.tools import doc_store
+
+
+def _sample_queries(n: int, words: int, seed: int) -> List[Tuple[str, str]]:
+    """Return (query, relevant (source, page)) pairs."""
+    rng = random.Random(seed)
+    page = doc_store._get_collection().get(include=["documents", "metadatas"])
+    candidates = [
+        (text, meta) for text, meta in zip(page["documents"], page["metadatas"])
+        if len(text.split()) > words * 2
+    ]
+    queries = []
+    for _ in range(n):
+        text, meta = rng.choice(candidates)
+        tokens = text.split()
+        start = rng.randrange(0, len(tokens) - words)
+        queries.append((" ".join(tokens[start:start + words]), f"{meta['source']}#{meta['page']}"))
+    return queries
+
+
+def _run(queries: List[Tuple[str, str]], k: int, hybrid: bool) -> Dict[str, float]:
+    latencies = []
+    hits = 0
+    returned_bytes = 0
+    for query, relevant in queries:
+        started = time.perf_counter()
+        chunks = doc_store.query_docs(query, n_results=k, hybrid=hybrid)
+        latencies.append(time.perf_counter() - started)
+        hits += any(f"{c.source}#{c.page}" == relevant for c in chunks)
+        returned_bytes += sum(len(c.text.encode("utf-8")) for c in chunks)
+
+    ms = np.array(latencies) * 1000
+    return {
+        f"recall@{k}": round(hits / len(queries), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_bytes": round(returned_bytes / len(queries), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dense vs hybrid retrieval benchmark")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--words", type=int, default=6, help="words per sampled query")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    queries = _sample_queries(args.queries, args.words, args.seed)
+    # Query embeddings are cached after the first pass; warm both modes equally
+    for query, _ in queries:
+        doc_store.embed_query(query)
+
+    print(json.dumps({
+        "queries": len(queries),
+        "k": args.k,
+        "dense": _run(queries, args.k, hybrid=False),
+        "hybrid": _run(queries, args.k, hybrid=True),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
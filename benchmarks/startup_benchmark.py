@@ -0,0 +1,99 @@
+# benchmarks/startup_benchmark.py
+# Cold-start timings for the API process.
+#
+#   python -m benchmarks.startup_benchmark --runs 3
+#
+# For each module: import time in a fresh interpreter.
+# For the server: time until /healthz and /readyz answer 200, with background
+# warm-up (default) and with BACKGROUND_WARMUP=false (the old eager startup).
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+
+MODULES = [
+    "app.tools.web_search",
+    "app.tools.doc_store",
+    "app.agent.graph",
+    "app.api.flask",
+]
+
+
+def _import_seconds(module: str) -> float:
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _wait_for(url: str, deadline: float) -> Optional[float]:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def _server_startup(port: int, background: bool, timeout: float) -> Dict[str, Optional[float]]:
+    env = {**os.environ, "FLASK_PORT": str(port), "BACKGROUND_WARMUP": str(background).lower()}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.api.flask"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        healthy = _wait_for(f"http://127.0.0.1:{port}/healthz", deadline)
+        ready = _wait_for(f"http://127.0.0.1:{port}/readyz", deadline)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    return {
+        "healthz_seconds": round(healthy - started, 3) if healthy else None,
+        "readyz_seconds": round(ready - started, 3) if ready else None,
+    }
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    imports = {
+        module: _median([_import_seconds(module) for _ in range(args.runs)])
+        for module in MODULES
+    }
+
+    servers = {}
+    for label, background in (("background_warmup", True), ("eager_warmup", False)):
+        runs = [_server_startup(args.port, background, args.timeout) for _ in range(args.runs)]
+        servers[label] = {
+            key: _median([r[key] for r in runs]) for key in ("healthz_seconds", "readyz_seconds")
+        }
+
+    print(json.dumps({"runs": args.runs, "import_seconds": imports, "server": servers}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# tests/conftest.py
+# Settings are read from the environment at import time; give the required keys
+# dummy values and keep every on-disk store in a throwaway directory.
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="research-tests-")
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GEMINI_MODEL_NAME", "test-model")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+os.environ.setdefault("API_BASE", "http://localhost:5000")
+os.environ.setdefault("CHROMA_PERSIST_DIR", os.path.join(_tmp, "chroma"))
+os.environ.setdefault("WEB_CACHE_PATH", os.path.join(_tmp, "web_search.sqlite3"))
+os.environ.setdefault("DRAFT_STORE_PATH", os.path.join(_tmp, "drafts.sqlite3"))
+os.environ.setdefault("TRACE_FILE", "")
+# Tests never download models: a missing tokenizer falls back at once instead of retrying the hub
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
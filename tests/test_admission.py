@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from app.agent import graph
+from app.api.admission import AdmissionController, AdmissionRejected
+from app.config import settings
+from app.models import ResearchRequest, ResearchState
+
+
+def _controller(max_concurrent=1, max_queue=1, max_queue_seconds=1.0):
+    return AdmissionController(
+        max_concurrent=max_concurrent,
+        max_queue=max_queue,
+        max_queue_seconds=max_queue_seconds,
+        retry_after_seconds=7,
+    )
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_admits_up_to_max_concurrent():
+    controller = _controller(max_concurrent=2, max_queue=0)
+    controller.acquire()
+    controller.acquire()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire()
+    assert (excinfo.value.reason, excinfo.value.status, excinfo.value.retry_after) == ("queue_full", 429, 7)
+
+    controller.release()
+    controller.acquire()  # a released slot is reusable
+
+
+def test_queue_timeout_is_503_and_leaves_the_queue():
+    controller = _controller(max_queue_seconds=0.05)
+    controller.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire()
+    assert (excinfo.value.reason, excinfo.value.status) == ("queue_timeout", 503)
+    assert len(controller._waiters) == 0
+
+    # The timed-out waiter must not receive the slot on release
+    controller.release()
+    assert controller._in_flight == 0
+
+
+def test_release_hands_the_slot_to_waiters_in_fifo_order():
+    controller = _controller(max_queue=2, max_queue_seconds=2.0)
+    controller.acquire()
+
+    admitted = []
+
+    def waiter(name):
+        controller.acquire()
+        admitted.append(name)
+
+    first = threading.Thread(target=waiter, args=("first",))
+    first.start()
+    _wait_for(lambda: len(controller._waiters) == 1)
+    second = threading.Thread(target=waiter, args=("second",))
+    second.start()
+    _wait_for(lambda: len(controller._waiters) == 2)
+
+    controller.release()
+    first.join(timeout=2)
+    assert admitted == ["first"]
+    # Handoff: the slot moved to the waiter without being counted free in between
+    assert controller._in_flight == 1
+
+    controller.release()
+    second.join(timeout=2)
+    assert admitted == ["first", "second"]
+
+    controller.release()
+    assert controller._in_flight == 0
+
+
+def test_slot_releases_on_error():
+    controller = _controller(max_queue=0)
+    with pytest.raises(RuntimeError):
+        with controller.slot():
+            raise RuntimeError("graph failed")
+    assert controller._in_flight == 0
+    with controller.slot():
+        assert controller._in_flight == 1
+
+
+@pytest.fixture
+def slow_graph(monkeypatch):
+    """Replace the graph with one that blocks until released; records each execution."""
+    release = threading.Event()
+    executions = []
+
+    def execute(req):
+        executions.append(req.query)
+        release.wait(2)
+        return ResearchState(query=req.query)
+
+    monkeypatch.setattr(graph, "_execute_graph", execute)
+    monkeypatch.setattr(settings, "semantic_cache_enabled", False)
+    return release, executions
+
+
+def test_followers_and_cache_hits_do_not_take_a_slot(slow_graph):
+    release, executions = slow_graph
+    controller = _controller(max_concurrent=1, max_queue=0)
+    req = ResearchRequest(query="admission: identical dashboard requests")
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(graph.run_research(req, admit=controller.slot))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: len(executions) == 1)
+    time.sleep(0.1)  # let the other callers join the flight in progress
+    release.set()
+    for t in threads:
+        t.join(timeout=2)
+
+    assert errors == []
+    assert len(results) == 5
+    assert executions == [req.query]
+    assert controller._in_flight == 0
+
+    # With every slot taken, a result-cache hit is still answered
+    controller.acquire()
+    assert graph.run_research(req, admit=controller.slot).query == req.query
+    assert executions == [req.query]
@@ -0,0 +1,157 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent import graph
+from app.config import settings
+from app.models import ResearchRequest, ResearchState, WebSearchResult
+from app.tools import doc_store
+from app.tools import web_search as web_search_module
+
+
+class _FakeLLM:
+    def stream(self, messages):
+        for token in ["### Overview\n", "Growing [W1].\n", "### Recommendations\n", "Expand [D1]."]:
+            yield SimpleNamespace(content=token)
+
+
+def _fake_web_search(query, max_results=5, search_depth="basic", use_cache=True, timeout=None):
+    return [WebSearchResult(title=f"{query} {i}", url=f"https://site{i}.com/{hash(query)}", snippet=f"{query} snippet {i}")
+            for i in range(max_results)]
+
+
+def _fake_vector_search(queries, n_results):
+    return [
+        {
+            "ids": [f"{q}-{i}" for i in range(n_results)],
+            "documents": [f"{q} internal finding {i}" for i in range(n_results)],
+            "metadatas": [{"doc_id": f"doc{i}", "source": "report.pdf", "page": i + 1} for i in range(n_results)],
+        }
+        for q in queries
+    ]
+
+
+@pytest.fixture
+def fake_clients(monkeypatch):
+    monkeypatch.setattr(web_search_module, "web_search", _fake_web_search)
+    monkeypatch.setattr(doc_store, "_vector_search", _fake_vector_search)
+    monkeypatch.setattr(settings, "hybrid_retrieval_enabled", False)
+    monkeypatch.setattr(settings, "llm_synthesis_enabled", True)
+    monkeypatch.setattr(graph, "get_llm", lambda: _FakeLLM())
+
+
+def _state(deadline_seconds):
+    return ResearchState(query="ev batteries", deadline=time.time() + deadline_seconds, deadline_seconds=deadline_seconds)
+
+
+def test_default_deadline_keeps_the_full_synthesis_reserve(monkeypatch):
+    monkeypatch.setattr(settings, "llm_synthesis_enabled", True)
+    budget = graph._remaining_budget(_state(20.0))
+    expected = 20.0 - settings.deadline_reserve_seconds - settings.llm_synthesis_budget_seconds
+    assert expected - 0.1 < budget <= expected
+
+
+@pytest.mark.parametrize("deadline_seconds", [0.5, 3.0, 9.0])
+def test_short_deadline_leaves_retrieval_a_share(monkeypatch, deadline_seconds):
+    monkeypatch.setattr(settings, "llm_synthesis_enabled", True)
+    budget = graph._remaining_budget(_state(deadline_seconds))
+    assert budget >= settings.retrieval_min_budget_fraction * deadline_seconds - 0.1
+
+
+def test_short_deadline_request_still_retrieves_and_synthesizes(fake_clients):
+    state = graph._execute_graph(ResearchRequest(query="ev batteries", competitors=["CATL"], deadline_seconds=3))
+
+    assert state.partial_sources == []
+    assert len(state.web_results) == 5
+    assert len(state.doc_chunks) == 10
+    assert state.synthesis["overview"] == "Growing [W1]."
+
+
+def _stalling_web_search(stalled_query, seconds):
+    def search(query, max_results=5, search_depth="basic", use_cache=True, timeout=None):
+        if query == stalled_query:
+            time.sleep(seconds)
+        return _fake_web_search(query, max_results)
+    return search
+
+
+def test_stalled_web_search_yields_none_within_the_timeout(monkeypatch):
+    monkeypatch.setattr(web_search_module, "web_search", _stalling_web_search("slow query", 1.0))
+
+    started = time.perf_counter()
+    results = web_search_module.web_search_many(["fast query", "slow query"], max_results=2, timeout=0.2)
+
+    assert time.perf_counter() - started < 0.6
+    assert len(results[0]) == 2
+    assert results[1] is None
+
+
+def test_failed_web_search_yields_none(monkeypatch):
+    def failing(query, *args, **kwargs):
+        raise RuntimeError("tavily down")
+
+    monkeypatch.setattr(web_search_module, "web_search", failing)
+    assert web_search_module.web_search_many(["q1"], timeout=1.0) == [None]
+
+
+def test_zero_budget_skips_the_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(web_search_module, "web_search", lambda *a, **kw: calls.append(a))
+    monkeypatch.setattr(doc_store, "_vector_search", lambda *a, **kw: calls.append(a))
+
+    assert web_search_module.web_search_many(["q1", "q2"], timeout=0) == [None, None]
+    assert doc_store.query_docs_many(["q1", "q2"], hybrid=False, timeout=0) == [None, None]
+    assert calls == []
+
+
+def test_stalled_web_search_makes_the_draft_partial(fake_clients, monkeypatch):
+    req = ResearchRequest(query="ev batteries stalled", deadline_seconds=2)
+    monkeypatch.setattr(web_search_module, "web_search", _stalling_web_search(req.query, 1.5))
+
+    started = time.perf_counter()
+    state = graph._execute_graph(req)
+
+    assert time.perf_counter() - started < 2.0
+    assert state.partial_sources == ["web_search"]
+    assert state.web_results == []
+    assert len(state.doc_chunks) == 10
+    assert "_Partial: some web searches timed out" in state.draft_markdown
+
+
+def test_stalled_doc_search_makes_the_draft_partial(fake_clients, monkeypatch):
+    def slow_vector_search(queries, n_results):
+        time.sleep(1.5)
+        return _fake_vector_search(queries, n_results)
+
+    monkeypatch.setattr(doc_store, "_vector_search", slow_vector_search)
+    state = graph._execute_graph(ResearchRequest(query="ev batteries slow docs", deadline_seconds=2))
+
+    assert state.partial_sources == ["doc_search"]
+    assert state.doc_chunks == []
+    assert len(state.web_results) == 5
+
+
+def test_build_session_applies_retry_and_timeout_settings(monkeypatch):
+    from requests.adapters import HTTPAdapter
+
+    from app.tools.http_client import build_session
+
+    monkeypatch.setattr(settings, "http_max_retries", 4)
+    monkeypatch.setattr(settings, "http_connect_timeout_seconds", 1.5)
+    monkeypatch.setattr(settings, "http_read_timeout_seconds", 7.0)
+
+    adapter = build_session().get_adapter("https://api.tavily.com")
+    retry = adapter.max_retries
+    assert adapter.timeout == (1.5, 7.0)
+    assert (retry.total, retry.connect, retry.read, retry.status) == (4, 4, 4, 4)
+    assert 503 in retry.status_forcelist and 429 in retry.status_forcelist
+    assert "GET" in retry.allowed_methods and "POST" not in retry.allowed_methods
+    assert "POST" in build_session(retry_post=True).get_adapter("http://x").max_retries.allowed_methods
+
+    # The default timeout applies only when the caller gives none
+    sent = []
+    monkeypatch.setattr(HTTPAdapter, "send", lambda self, request, **kwargs: sent.append(kwargs["timeout"]))
+    adapter.send(object())
+    adapter.send(object(), timeout=2.0)
+    assert sent == [(1.5, 7.0), 2.0]
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.tools import doc_store
+from app.tools.lexical_index import BM25Index
+
+
+PDF = "data/documents/NIPS-2017-attention-is-all-you-need-Paper.pdf"
+NAME = "paper.pdf"
+
+
+class _FakeEmbedder:
+    def __init__(self):
+        self.texts = 0
+
+    def __call__(self, texts):
+        self.texts += len(texts)
+        return [[float(len(t) % 7), 1.0, 0.5] for t in texts]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A throwaway collection, BM25 index and manifest, with a counting fake embedder."""
+    embedder = _FakeEmbedder()
+    collection = doc_store.get_chroma_client().get_or_create_collection(
+        name=f"test_docs_{uuid.uuid4().hex[:8]}", embedding_function=None
+    )
+    monkeypatch.setattr(doc_store, "_embedding_function", embedder)
+    monkeypatch.setattr(doc_store, "_collection", collection)
+    monkeypatch.setattr(doc_store, "_lexical_index", BM25Index())
+    monkeypatch.setattr(doc_store, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(doc_store, "LEXICAL_INDEX_PATH", str(tmp_path / "lexical.pkl"))
+    monkeypatch.setattr(settings, "index_workers", 1)
+
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    shutil.copy(PDF, folder / NAME)
+    yield folder, collection, embedder
+    doc_store.get_chroma_client().delete_collection(collection.name)
+
+
+def _manifest():
+    with open(doc_store.MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_first_sync_indexes_under_a_content_derived_id(store):
+    folder, collection, _ = store
+    stats = doc_store.sync_local_docs(str(folder))
+
+    assert (stats["added"], stats["updated"], stats["unchanged"], stats["removed"]) == (1, 0, 0, 0)
+    assert stats["chunks"] == collection.count() > 0
+
+    doc_id = hashlib.sha256(f"{NAME}:{_sha256(folder / NAME)}".encode("utf-8")).hexdigest()[:32]
+    assert _manifest()[NAME]["doc_id"] == doc_id
+    ids = collection.get(include=[])["ids"]
+    assert all(chunk_id.startswith(f"{doc_id}_page_") for chunk_id in ids)
+    assert len(doc_store._get_lexical_index()) == len(ids)
+    assert os.path.exists(doc_store.LEXICAL_INDEX_PATH)
+
+
+def test_unchanged_and_touched_files_are_not_reembedded(store):
+    folder, collection, embedder = store
+    doc_store.sync_local_docs(str(folder))
+    embedded, ids = embedder.texts, sorted(collection.get(include=[])["ids"])
+
+    assert doc_store.sync_local_docs(str(folder))["unchanged"] == 1
+
+    stat = os.stat(folder / NAME)
+    os.utime(folder / NAME, (stat.st_atime, stat.st_mtime + 100))
+    assert doc_store.sync_local_docs(str(folder))["unchanged"] == 1
+    assert _manifest()[NAME]["mtime"] == stat.st_mtime + 100
+
+    assert embedder.texts == embedded
+    assert sorted(collection.get(include=[])["ids"]) == ids
+
+
+def test_changed_file_replaces_its_chunks(store):
+    folder, collection, _ = store
+    doc_store.sync_local_docs(str(folder))
+    old_doc_id = _manifest()[NAME]["doc_id"]
+
+    with open(folder / NAME, "ab") as f:
+        f.write(b"\n% appended revision\n")
+    stats = doc_store.sync_local_docs(str(folder))
+
+    assert (stats["added"], stats["updated"]) == (0, 1)
+    new_doc_id = _manifest()[NAME]["doc_id"]
+    assert new_doc_id != old_doc_id
+    ids = collection.get(include=[])["ids"]
+    assert ids and all(chunk_id.startswith(new_doc_id) for chunk_id in ids)
+    assert len(doc_store._get_lexical_index()) == len(ids)
+
+
+def test_removed_file_is_deleted(store):
+    folder, collection, _ = store
+    doc_store.sync_local_docs(str(folder))
+    os.remove(folder / NAME)
+
+    assert doc_store.sync_local_docs(str(folder))["removed"] == 1
+    assert collection.count() == 0
+    assert len(doc_store._get_lexical_index()) == 0
+    assert _manifest() == {}
+
+
+def test_legacy_uuid_chunks_are_cleaned_up(store):
+    folder, collection, _ = store
+    # Chunks from the old uuid-based indexer carry the file name as source
+    collection.add(
+        ids=[str(uuid.uuid4())],
+        embeddings=[[0.0, 1.0, 0.0]],
+        documents=["legacy chunk"],
+        metadatas=[{"doc_id": "legacy", "source": NAME, "page": 0}],
+    )
+    doc_store.sync_local_docs(str(folder))
+
+    assert collection.get(where={"doc_id": "legacy"}, include=[])["ids"] == []
+
+
+def test_force_and_chunker_change_reindex(store, monkeypatch):
+    folder, _, embedder = store
+    doc_store.sync_local_docs(str(folder))
+
+    assert doc_store.sync_local_docs(str(folder), force=True)["updated"] == 1
+
+    embedded = embedder.texts
+    monkeypatch.setattr(doc_store, "chunker_signature", lambda: "different-chunker")
+    assert doc_store.sync_local_docs(str(folder))["updated"] == 1
+    assert embedder.texts > embedded
+
+
+def test_missing_folder_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        doc_store.sync_local_docs(str(tmp_path / "nope"))
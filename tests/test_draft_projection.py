@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from app.api.flask import InvalidProjection, app, draft_projection, draft_response
+from app.models import DocumentChunk, DraftReport
+
+
+def _projection(query_string):
+    with app.test_request_context(query_string=query_string):
+        return draft_projection()
+
+
+def _draft():
+    return DraftReport(
+        id="d1",
+        query="ev batteries",
+        draft_markdown="# Draft",
+        web_results=[],
+        doc_chunks=[DocumentChunk(doc_id="doc", source="report.pdf", page=3, text="long page text")],
+    )
+
+
+def test_no_arguments_is_the_full_draft():
+    assert _projection({}) == {}
+
+
+def test_fields_selects_top_level_fields():
+    assert _projection({"fields": " id, draft_markdown ,,"}) == {"include": {"id", "draft_markdown"}}
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(InvalidProjection, match="unknown fields: bogus, nope"):
+        _projection({"fields": "id,nope,bogus"})
+
+
+def test_chunks_ref_drops_chunk_text():
+    body = json.loads(draft_response(_draft(), _projection({"chunks": "ref"})).get_data())
+    assert body["doc_chunks"] == [
+        {"doc_id": "doc", "source": "report.pdf", "page": 3, "chunk_id": None, "start_offset": None}
+    ]
+    assert body["draft_markdown"] == "# Draft"
+
+
+def test_fields_and_chunks_ref_combine():
+    projection = _projection({"fields": "id,doc_chunks", "chunks": "ref"})
+    body = json.loads(draft_response(_draft(), projection).get_data())
+    assert set(body) == {"id", "doc_chunks"}
+    assert "text" not in body["doc_chunks"][0]
+
+
+def test_job_polling_validates_fields_before_the_job_lookup():
+    client = app.test_client()
+    resp = client.get("/api/research/jobs/no-such-job?fields=nope")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "InvalidFields"
+    assert client.get("/api/research/jobs/no-such-job?fields=id").status_code == 404
@@ -0,0 +1,38 @@
+from prometheus_client import REGISTRY
+
+from app.api.drafts import DraftRepository
+from app.models import DraftReport
+
+
+def _draft(i):
+    return DraftReport(id=f"d{i}", query="q", draft_markdown="# d", web_results=[], doc_chunks=[])
+
+
+def _size():
+    return REGISTRY.get_sample_value("draft_store_size")
+
+
+def test_saved_drafts_are_found_in_memory_and_on_disk(tmp_path):
+    path = str(tmp_path / "drafts.sqlite3")
+    DraftRepository(path, ttl_seconds=60, max_cached=4).save(_draft(1))
+
+    # A fresh repository (e.g. after a restart) still finds it on disk
+    reopened = DraftRepository(path, ttl_seconds=60, max_cached=4)
+    assert reopened.get("d1") == _draft(1)
+    assert reopened.get("missing") is None
+
+
+def test_size_gauge_is_not_recounted_on_every_save(tmp_path, monkeypatch):
+    repo = DraftRepository(str(tmp_path / "drafts.sqlite3"), ttl_seconds=60, max_cached=4, size_refresh_seconds=3600)
+    counts = []
+    count = repo._disk.count
+    monkeypatch.setattr(repo._disk, "count", lambda: counts.append(1) or count())
+
+    for i in range(50):
+        repo.save(_draft(i))
+    assert counts == []
+
+    repo._size_counted_at = float("-inf")  # refresh interval elapsed
+    repo.save(_draft(50))
+    assert len(counts) == 1
+    assert _size() == 51
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from app.tools.embedding_server import EmbeddingServer, MicroBatcher
+from app.tools.embeddings import RemoteEmbeddingFunction
+
+
+class _CountingEmbedder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.texts = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        time.sleep(self.delay)
+        with self.lock:
+            self.texts += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(embed_fn):
+        # AF_UNIX paths are limited to ~100 bytes, so keep the directory short
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="emb-"), "s.sock")
+        batcher = MicroBatcher(embed_fn, max_batch_size=64, max_wait_ms=2)
+        batcher.start()
+        server = EmbeddingServer(socket_path, batcher)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return socket_path
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_concurrent_clients_all_connect(serve):
+    socket_path = serve(_CountingEmbedder())
+    errors, results = [], []
+    barrier = threading.Barrier(40)
+
+    def client(i):
+        try:
+            barrier.wait()
+            results.append(RemoteEmbeddingFunction(socket_path, timeout=5)([f"text {i}"]))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert errors == []
+    assert len(results) == 40
+
+
+def test_read_timeout_is_not_resent(serve):
+    embedder = _CountingEmbedder(delay=0.5)
+    socket_path = serve(embedder)
+
+    with pytest.raises(TimeoutError):
+        RemoteEmbeddingFunction(socket_path, timeout=0.1)(["a", "b"])
+    # Long enough for a resent batch to have been embedded too
+    time.sleep(1.2)
+    assert embedder.texts == 2
+
+
+def test_connect_gives_up_after_retries():
+    missing = os.path.join(tempfile.mkdtemp(prefix="emb-"), "none.sock")
+    fn = RemoteEmbeddingFunction(missing, timeout=1, connect_retries=2, connect_backoff=0.001)
+    with pytest.raises(FileNotFoundError):
+        fn(["a"])
@@ -0,0 +1,39 @@
+import threading
+import time
+
+import pytest
+
+from app.api import flask as api
+from app.api.jobs import JobManager, QueueFullError
+from app.config import settings
+
+
+def test_queue_full_is_raised_past_max_queue():
+    manager = JobManager(workers=1, max_queue=1, retention_seconds=60, max_retained=10)
+    release = threading.Event()
+    running = manager.submit(release.wait, 2)  # occupies the only worker
+    deadline = time.time() + 2
+    while running.status != "running":
+        assert time.time() < deadline
+        time.sleep(0.005)
+    queued = manager.submit(lambda: "done")
+    try:
+        with pytest.raises(QueueFullError):
+            manager.submit(lambda: "rejected")
+    finally:
+        release.set()
+    assert manager.get(running.id) is running
+    assert manager.get(queued.id) is queued
+
+
+def test_full_job_queue_is_429_with_configured_retry_after(monkeypatch):
+    def full(*args, **kwargs):
+        raise QueueFullError("job queue is full (32 waiting)")
+
+    monkeypatch.setattr(api.job_manager, "submit", full)
+    monkeypatch.setattr(settings, "job_retry_after_seconds", 11)
+
+    resp = api.app.test_client().post("/api/research/jobs", json={"query": "ev battery market"})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "11"
+    assert resp.get_json()["error"] == "QueueFull"
@@ -0,0 +1,104 @@
+from app.tools.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def _index():
+    index = BM25Index()
+    index.add(
+        ["a1", "a2", "b1", "c1"],
+        [
+            "CATL leads the lithium battery market",
+            "BYD and CATL expand LFP capacity",
+            "Model X-200 sensor datasheet v2.1",
+            "quarterly retail foot traffic report",
+        ],
+        ["a.pdf", "a.pdf", "b.pdf", "c.pdf"],
+    )
+    return index
+
+
+def _ids(results):
+    return [chunk_id for chunk_id, _ in results]
+
+
+def test_tokenize_keeps_codes_intact():
+    assert tokenize("Model X-200, firmware v2.1!") == ["model", "x-200", "firmware", "v2.1"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_matching_documents():
+    index = _index()
+    assert _ids(index.search("x-200", k=5)) == ["b1"]
+    assert set(_ids(index.search("catl", k=5))) == {"a1", "a2"}
+    assert _ids(index.search("catl byd lfp", k=1)) == ["a2"]
+    assert index.search("nothing matches", k=5) == []
+    assert index.search("catl", k=0) == []
+
+
+def test_readding_an_id_replaces_its_text():
+    index = _index()
+    index.add(["b1"], ["updated datasheet for model y-300"], ["b.pdf"])
+    assert index.search("x-200", k=5) == []
+    assert _ids(index.search("y-300", k=5)) == ["b1"]
+    assert len(index) == 4
+
+
+def test_remove_source_drops_its_documents():
+    index = _index()
+    index.remove_source("a.pdf")
+    assert index.search("catl", k=5) == []
+    assert len(index) == 2
+    assert _ids(index.search("x-200", k=5)) == ["b1"]
+
+
+def test_tombstones_are_compacted_on_replace_as_well_as_remove():
+    index = BM25Index()
+    index.add([f"d{i}" for i in range(8)], [f"doc {i} common" for i in range(8)], ["s.pdf"] * 8)
+    for _ in range(3):
+        index.add(["d0", "d1"], ["doc 0 common", "doc 1 common"], ["s.pdf", "s.pdf"])
+    # Never more than a quarter of the ordinals are dead
+    assert len(index._ids) - len(index) <= len(index._ids) // 4
+    assert len(index) == 8
+    assert len(index.search("common", k=20)) == 8
+
+
+def test_idf_ignores_tombstoned_postings():
+    index = BM25Index()
+    index.add(["rare", "other1", "other2", "other3"], ["rare term", "filler", "filler", "filler"], ["s"] * 4)
+    baseline = index.search("term", k=1)[0][1]
+    for _ in range(3):
+        index.add(["rare"], ["rare term"], ["s"])
+    # Re-adds leave stale postings until compaction; they must not change the score
+    assert index.search("term", k=1) == [("rare", baseline)]
+    assert baseline > 0
+
+
+def test_scoring_cache_follows_writes():
+    index = _index()
+    before = index.search("catl", k=5)
+    index.add(["a3"], ["catl catl catl"], ["a.pdf"])
+    after = index.search("catl", k=5)
+    assert _ids(after)[0] == "a3"
+    # Adding a document changes the average length, and so every score
+    assert dict(after)["a1"] != dict(before)["a1"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _index()
+    index.search("catl", k=5)
+    path = str(tmp_path / "bm25.pkl")
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+    assert loaded.search("catl byd", k=5) == index.search("catl byd", k=5)
+    assert not loaded.dirty
+    loaded.add(["d1"], ["catl again"], ["d.pdf"])
+    assert "d1" in _ids(loaded.search("catl", k=5))
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+    assert fused[0] == "a"  # ranks 1 and 2
+    assert fused[1] == "c"  # ranks 3 and 1
+    assert set(fused) == {"a", "b", "c", "d"}
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([["x"], []]) == ["x"]
@@ -0,0 +1,75 @@
+from app.config import settings
+from app.models import WebSearchResult
+from app.tools.near_dup import kept_indices, suppress_near_duplicates
+
+
+ARTICLE = (
+    "Global lithium-ion battery demand rose sharply in 2024 as electric vehicle sales "
+    "expanded in China and Europe, with LFP chemistry taking a larger share of new packs."
+)
+OTHER = (
+    "Retail foot traffic in suburban malls recovered slowly after the pandemic, while "
+    "grocery-anchored centres outperformed enclosed shopping destinations."
+)
+
+
+def _kept(texts, threshold=0.8):
+    return kept_indices(texts, threshold=threshold, num_perm=128, shingle_size=3)
+
+
+def test_empty_input():
+    assert _kept([]) == []
+
+
+def test_exact_copy_is_dropped_and_first_copy_kept():
+    assert _kept([ARTICLE, OTHER, ARTICLE]) == [0, 1]
+
+
+def test_near_copy_is_dropped():
+    syndicated = ARTICLE + " Reporting by a wire service."
+    assert _kept([ARTICLE, syndicated]) == [0]
+
+
+def test_distinct_texts_are_all_kept_in_order():
+    assert _kept([OTHER, ARTICLE]) == [0, 1]
+
+
+def test_threshold_above_one_keeps_everything():
+    assert _kept([ARTICLE, ARTICLE], threshold=1.01) == [0, 1]
+
+
+def test_blank_texts_are_kept_and_never_match():
+    assert _kept(["", "   ", ARTICLE, ""]) == [0, 1, 2, 3]
+
+
+def _result(i, snippet):
+    return WebSearchResult(title=f"Result {i}", url=f"https://site{i}.com/a", snippet=snippet)
+
+
+def test_suppress_returns_kept_items_and_bytes_dropped(monkeypatch):
+    monkeypatch.setattr(settings, "near_dup_enabled", True)
+    items = [_result(1, ARTICLE), _result(2, OTHER), _result(3, ARTICLE)]
+
+    kept, saved = suppress_near_duplicates(items, lambda r: r.snippet, kind="web_results")
+
+    assert kept == items[:2]
+    assert saved == len(items[2].model_dump_json().encode("utf-8"))
+
+
+def test_suppress_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "near_dup_enabled", False)
+    items = [_result(1, ARTICLE), _result(2, ARTICLE)]
+    assert suppress_near_duplicates(items, lambda r: r.snippet, kind="web_results") == (items, 0)
+
+
+def test_suppress_counts_only_bytes_dropped_within_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "near_dup_enabled", True)
+    items = [_result(1, ARTICLE), _result(2, OTHER), _result(3, ARTICLE), _result(4, ARTICLE)]
+    text = lambda r: r.snippet
+
+    # Both copies would have fallen past the first two results anyway
+    assert suppress_near_duplicates(items, text, kind="web_results", limit=2) == (items[:2], 0)
+
+    kept, saved = suppress_near_duplicates(items, text, kind="web_results", limit=3)
+    assert kept == items[:2]
+    assert saved == len(items[2].model_dump_json().encode("utf-8"))
@@ -0,0 +1,35 @@
+import threading
+import warnings
+
+from app.config import settings
+from app.tools import doc_store
+from app.tools.pdf_extract import count_pages
+
+
+PDF = "data/documents/NIPS-2017-attention-is-all-you-need-Paper.pdf"
+
+
+def test_pool_extraction_matches_serial_while_other_threads_run(monkeypatch):
+    monkeypatch.setattr(settings, "index_pages_per_task", 3)
+    files = [("doc1", "paper.pdf", PDF)]
+
+    monkeypatch.setattr(settings, "index_workers", 1)
+    serial = sorted(doc_store._iter_extracted_pages(files))
+
+    # As in the API process: other threads are alive while the sync runs
+    stop = threading.Event()
+    busy = threading.Thread(target=stop.wait, daemon=True)
+    busy.start()
+    monkeypatch.setattr(settings, "index_workers", 2)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            pooled = sorted(doc_store._iter_extracted_pages(files))
+    finally:
+        stop.set()
+
+    # Python 3.12 warns when a multi-threaded process forks
+    assert not [w for w in caught if "fork()" in str(w.message)]
+    assert pooled == serial
+    assert {page for _, _, page, _ in pooled} <= set(range(count_pages(PDF)))
+    assert len(pooled) > 0
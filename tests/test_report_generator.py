@@ -0,0 +1,33 @@
+from app.models import DocumentChunk
+from app.report.generator import _doc_citations, _page_ranges
+
+
+def _chunk(source, page):
+    return DocumentChunk(doc_id=f"{source}-{page}", source=source, page=page, text="...")
+
+
+def test_page_ranges_collapses_runs_and_sorts():
+    assert _page_ranges([7, 1, 2, 3, 3]) == "1-3, 7"
+
+
+def test_page_ranges_single_page():
+    assert _page_ranges([4]) == "4"
+
+
+def test_page_ranges_no_runs():
+    assert _page_ranges([9, 5, 1]) == "1, 5, 9"
+
+
+def test_doc_citations_one_line_per_document():
+    chunks = [
+        _chunk("annual_report.pdf", 5),
+        _chunk("memo.pdf", 2),
+        _chunk("annual_report.pdf", 3),
+        _chunk("annual_report.pdf", 4),
+        _chunk("memo.pdf", 2),
+    ]
+    assert _doc_citations(chunks) == ["annual_report.pdf, pp. 3-5", "memo.pdf, p. 2"]
+
+
+def test_doc_citations_empty():
+    assert _doc_citations([]) == []
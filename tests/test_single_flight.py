@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from app.agent import graph
+from app.cache import SingleFlight
+from app.config import settings
+from app.models import ResearchRequest, ResearchState
+
+
+def _run_concurrently(n, fn):
+    """Start n threads calling fn(); returns (results, errors) once all finish."""
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            value = fn()
+            with lock:
+                results.append(value)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def _join(threads):
+    for t in threads:
+        t.join(timeout=2)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return {"answer": 42}
+
+    threads, results, errors = _run_concurrently(5, lambda: flight.do("k", work))
+    time.sleep(0.1)  # every caller has joined the flight in progress
+    release.set()
+    _join(threads)
+
+    assert errors == [] and len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(value is results[0][0] for value, _ in results)
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(2)
+        raise ValueError("graph failed")
+
+    threads, results, errors = _run_concurrently(3, lambda: flight.do("k", work))
+    time.sleep(0.1)
+    release.set()
+    _join(threads)
+
+    assert results == []
+    assert len(errors) == 3 and all(isinstance(e, ValueError) for e in errors)
+
+
+def test_keys_are_independent_and_released_after_completion():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+
+    def fail():
+        raise RuntimeError("x")
+
+    # Nothing is remembered once the call finished, even after an error
+    with pytest.raises(RuntimeError):
+        flight.do("a", fail)
+    assert flight.do("a", lambda: 3) == (3, False)
+    assert flight._calls == {}
+
+
+@pytest.fixture
+def fake_graph(monkeypatch):
+    """_execute_graph stand-in whose states are partial while `partial` is non-empty."""
+    executions = []
+    partial = []
+
+    def execute(req):
+        executions.append(req.query)
+        return ResearchState(query=req.query, partial_sources=list(partial))
+
+    monkeypatch.setattr(graph, "_execute_graph", execute)
+    monkeypatch.setattr(settings, "semantic_cache_enabled", False)
+    return executions, partial
+
+
+def test_partial_drafts_are_not_cached(fake_graph):
+    executions, partial = fake_graph
+    req = ResearchRequest(query="single flight: partial results")
+
+    partial.append("web_search")
+    assert graph.run_research(req).partial_sources == ["web_search"]
+    graph.run_research(req)
+    assert len(executions) == 2  # retried, not served from cache
+
+    partial.clear()
+    graph.run_research(req)
+    graph.run_research(req)
+    assert len(executions) == 3  # the complete draft is cached
+
+
+def test_run_research_callers_get_their_own_copy(fake_graph):
+    executions, _ = fake_graph
+    req = ResearchRequest(query="single flight: isolated copies")
+
+    first = graph.run_research(req)
+    first.citations.append("mutated by the first caller")
+    second = graph.run_research(req)
+
+    assert len(executions) == 1
+    assert second.citations == []
+
+
+def test_bypass_cache_always_executes(fake_graph):
+    executions, _ = fake_graph
+    req = ResearchRequest(query="single flight: bypass", bypass_cache=True)
+    graph.run_research(req)
+    graph.run_research(req)
+    assert len(executions) == 2
@@ -0,0 +1,137 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.synthesis import estimate_tokens, pack_evidence, parse_sections, stream_synthesis
+from app.models import DocumentChunk, WebSearchResult
+
+
+def _web(i, domain=None, snippet=None):
+    return WebSearchResult(
+        title=f"Result {i}",
+        url=f"https://{domain or f'site{i}.com'}/article-{i}",
+        snippet=snippet or f"distinct snippet number {i} about topic {i * 17} and figure {i * 31}",
+    )
+
+
+def _chunk(i, source=None):
+    return DocumentChunk(
+        doc_id=f"doc{i}",
+        source=source or f"report_{i}.pdf",
+        page=i,
+        text=f"internal finding {i} covering segment {i * 13} with estimate {i * 7}",
+    )
+
+
+def _pack(web, docs, budget=10_000, cap=10, threshold=0.8):
+    return pack_evidence(web, docs, budget_tokens=budget, per_source_cap=cap, dedup_threshold=threshold)
+
+
+def test_empty_inputs_pack_nothing():
+    assert _pack([], []) == []
+
+
+def test_web_and_doc_evidence_interleave_by_rank():
+    packed = _pack([_web(1), _web(2)], [_chunk(1), _chunk(2)])
+    # Equal reciprocal-rank scores: the rank-1 items come before either rank-2 item
+    assert {e.label for e in packed[:2]} == {"W1", "D1"}
+    assert {e.label for e in packed[2:]} == {"W2", "D2"}
+
+
+def test_budget_is_never_exceeded():
+    web = [_web(i) for i in range(1, 21)]
+    budget = 80
+    packed = _pack(web, [], budget=budget)
+    assert 0 < len(packed) < len(web)
+    assert sum(e.tokens for e in packed) <= budget
+
+
+def test_oversized_item_is_skipped_but_smaller_ones_still_fit():
+    big = _web(1, snippet="word " * 400)
+    packed = _pack([big, _web(2)], [], budget=60)
+    assert [e.label for e in packed] == ["W2"]
+
+
+def test_per_source_cap():
+    web = [_web(i, domain="same.com") for i in range(1, 6)]
+    packed = _pack(web, [_chunk(1)], cap=2)
+    assert [e.label for e in packed if e.label.startswith("W")] == ["W1", "W2"]
+    assert any(e.label == "D1" for e in packed)
+
+
+def test_near_duplicates_keep_the_higher_ranked_copy():
+    text = "the global ev battery market grew strongly in 2024 led by lfp chemistry in china"
+    packed = _pack([_web(1, snippet=text), _web(2, snippet=text + " analysts said")], [], threshold=0.5)
+    assert [e.label for e in packed] == ["W1"]
+
+
+def test_estimate_tokens_is_roughly_four_chars_per_token():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+
+
+def test_parse_sections_splits_on_expected_headings():
+    text = (
+        "### Overview\nMarket is growing [W1].\n\n"
+        "## Competitive Landscape\nCATL leads [D2].\n"
+        "### Recommendations\nExpand in Europe."
+    )
+    assert parse_sections(text) == {
+        "overview": "Market is growing [W1].",
+        "competition": "CATL leads [D2].",
+        "recommendations": "Expand in Europe.",
+    }
+
+
+def test_parse_sections_unlabelled_text_goes_to_recommendations():
+    sections = parse_sections("Some preamble.\n### Overview\nBody.\n### Appendix\nExtra notes.")
+    assert sections["overview"] == "Body.\n### Appendix\nExtra notes."
+    assert sections["recommendations"] == "Some preamble."
+
+
+class _FakeLLM:
+    """Streams chunks with an optional delay; records how far it got and whether it was closed."""
+
+    def __init__(self, tokens, delay=0.0, error=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.error = error
+        self.pulled = 0
+        self.closed = threading.Event()
+
+    def stream(self, messages):
+        if self.error is not None:
+            raise self.error
+        try:
+            for token in self.tokens:
+                time.sleep(self.delay)
+                self.pulled += 1
+                yield SimpleNamespace(content=token)
+        finally:
+            self.closed.set()
+
+
+def test_stream_synthesis_passes_every_token_through():
+    llm = _FakeLLM(["Hello", " ", "world"])
+    received = []
+    text, complete = stream_synthesis(llm, [("human", "hi")], received.append)
+    assert (text, complete) == ("Hello world", True)
+    assert received == ["Hello", " ", "world"]
+
+
+def test_stream_synthesis_stops_at_deadline_and_closes_the_stream():
+    llm = _FakeLLM([f"t{i} " for i in range(100)], delay=0.02)
+    text, complete = stream_synthesis(llm, [("human", "hi")], lambda _: None, deadline=time.time() + 0.15)
+    assert complete is False
+    assert text.startswith("t0 ")
+    # The producer notices the stop flag at its next chunk instead of draining the model
+    assert llm.closed.wait(1.0)
+    assert llm.pulled < 100
+
+
+def test_stream_synthesis_raises_client_errors():
+    llm = _FakeLLM([], error=RuntimeError("quota exceeded"))
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        stream_synthesis(llm, [("human", "hi")], lambda _: None, deadline=time.time() + 5)
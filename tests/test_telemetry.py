@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.telemetry import span, timed_tool
+
+
+def _tool_count(tool: str, operation: str, outcome: str) -> float:
+    return REGISTRY.get_sample_value(
+        "research_tool_call_seconds_count",
+        {"tool": tool, "operation": operation, "outcome": outcome},
+    ) or 0.0
+
+
+def test_spans_nest_under_the_current_span():
+    with span("research") as root:
+        with span("node.web_search") as child:
+            with span("tavily.search") as grandchild:
+                pass
+
+    assert root.parent_span_id is None
+    assert child.parent_span_id == root.span_id
+    assert grandchild.parent_span_id == child.span_id
+    assert {root.trace_id, child.trace_id, grandchild.trace_id} == {root.trace_id}
+
+
+def test_sibling_roots_start_separate_traces():
+    with span("a") as a:
+        pass
+    with span("b") as b:
+        pass
+    assert a.trace_id != b.trace_id
+    assert b.parent_span_id is None
+
+
+def test_span_records_error_and_reraises():
+    with pytest.raises(ValueError):
+        with span("failing") as s:
+            raise ValueError("boom")
+    assert s.status == "ERROR"
+    assert s.attributes["exception.type"] == "ValueError"
+    assert s.end_time_unix_nano >= s.start_time_unix_nano
+
+
+def test_timed_tool_labels_outcome():
+    ok_before = _tool_count("test_tool", "op", "ok")
+    error_before = _tool_count("test_tool", "op", "error")
+
+    with timed_tool("test_tool", "op"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed_tool("test_tool", "op"):
+            raise RuntimeError("down")
+
+    assert _tool_count("test_tool", "op", "ok") == ok_before + 1
+    assert _tool_count("test_tool", "op", "error") == error_before + 1
+
+
+def test_spans_export_as_json_lines(tmp_path, monkeypatch):
+    trace_file = tmp_path / "traces" / "spans.jsonl"
+    monkeypatch.setattr(settings, "trace_file", str(trace_file))
+
+    with span("research", query="ev batteries"):
+        with timed_tool("chroma", "query", n_results=5):
+            pass
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    # Children finish (and are written) first
+    assert [s["name"] for s in spans] == ["chroma.query", "research"]
+    assert spans[0]["parent_span_id"] == spans[1]["span_id"]
+    assert spans[0]["attributes"] == {"n_results": 5}
+    assert spans[1]["attributes"] == {"query": "ev batteries"}
+
+
+def test_no_export_without_trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "trace_file", "")
+    monkeypatch.chdir(tmp_path)
+    with span("quiet"):
+        pass
+    assert list(tmp_path.iterdir()) == []
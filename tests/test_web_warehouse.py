@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.models import WebSearchResult
+from app.tools import doc_store, web_warehouse
+from app.tools import web_search as web_search_module
+from app.tools.web_warehouse import canonical_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://WWW.Example.COM/Path/", "https://example.com/Path"),
+    ("https://example.com/a?utm_source=x&id=3&UTM_Medium=y", "https://example.com/a?id=3"),
+    ("https://example.com/a?gclid=1&fbclid=2&ref=feed&mc_cid=3&mc_eid=4", "https://example.com/a"),
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a#section-2", "https://example.com/a"),
+    ("  https://example.com/a  ", "https://example.com/a"),
+    ("//example.com/a", "https://example.com/a"),
+    ("https://example.com/a?empty=", "https://example.com/a?empty="),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_canonical_url_keeps_subdomains_and_path_case():
+    assert canonical_url("https://News.Example.com/Story") == "https://news.example.com/Story"
+
+
+def _embed(text):
+    # Every text points the same way: similarity 1.0, so freshness alone decides coverage
+    return [1.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    monkeypatch.setattr(doc_store, "embed_query", _embed)
+    monkeypatch.setattr(doc_store, "embed_documents", lambda texts: [_embed(t) for t in texts])
+    monkeypatch.setattr(settings, "web_warehouse_min_coverage", 1.0)
+    monkeypatch.setattr(settings, "web_warehouse_prune_interval_seconds", float("inf"))
+    collection = web_warehouse._get_collection()
+    existing = collection.get(include=[])["ids"]
+    if existing:
+        collection.delete(ids=existing)
+    return collection
+
+
+def _store_at(monkeypatch, fetched_at, results):
+    monkeypatch.setattr(web_warehouse.time, "time", lambda: fetched_at)
+    web_warehouse.store(results)
+
+
+def _results(prefix, n):
+    return [WebSearchResult(title=f"{prefix} {i}", url=f"https://{prefix}.com/{i}", snippet=f"{prefix} {i}") for i in range(n)]
+
+
+def test_store_dedupes_by_canonical_url(warehouse, monkeypatch):
+    _store_at(monkeypatch, 1_000.0, [
+        WebSearchResult(title="a", url="https://www.site.com/x/?utm_source=feed", snippet="a"),
+        WebSearchResult(title="a", url="https://site.com/x", snippet="a"),
+    ])
+    assert warehouse.count() == 1
+
+
+def test_lookup_only_counts_fresh_pages(warehouse, monkeypatch):
+    now = 1_000_000.0
+    max_age = settings.web_warehouse_max_age_seconds
+    _store_at(monkeypatch, now - max_age - 10, _results("old", 3))
+    _store_at(monkeypatch, now, _results("new", 2))
+    monkeypatch.setattr(web_warehouse.time, "time", lambda: now)
+
+    # Two fresh pages are full coverage for two results, even with older ones stored
+    hit = web_warehouse.lookup("query", max_results=2)
+    assert sorted(r.title for r in hit) == ["new 0", "new 1"]
+
+    # Three are needed: stored pages would cover it, but only two are fresh
+    assert web_warehouse.lookup("query", max_results=3) is None
+
+
+def test_prune_deletes_pages_past_retention(warehouse, monkeypatch):
+    now = 1_000_000.0
+    retention = settings.web_warehouse_retention_seconds
+    _store_at(monkeypatch, now - retention - 1, _results("expired", 2))
+    _store_at(monkeypatch, now - retention + 1, _results("kept", 1))
+
+    assert web_warehouse.prune(now) == 2
+    assert [m["title"] for m in warehouse.get(include=["metadatas"])["metadatas"]] == ["kept 0"]
+    assert web_warehouse.prune(now) == 0
+
+
+class _CountingCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.queries = 0
+
+    def query(self, **kwargs):
+        self.queries += 1
+        return self.collection.query(**kwargs)
+
+
+def test_a_miss_costs_a_single_query(warehouse, monkeypatch):
+    counting = _CountingCollection(warehouse)
+    monkeypatch.setattr(web_warehouse, "_get_collection", lambda: counting)
+    assert web_warehouse.lookup("nothing stored yet", max_results=5) is None
+    assert counting.queries == 1
+
+
+def test_live_results_are_stored_off_the_request_path(monkeypatch):
+    stored = threading.Event()
+
+    def slow_store(results):
+        time.sleep(0.5)
+        stored.set()
+
+    class _Tavily:
+        def search(self, **kwargs):
+            return {"results": [{"title": "t", "url": "https://example.com/a", "content": "c"}]}
+
+    monkeypatch.setattr(web_warehouse, "store", slow_store)
+    monkeypatch.setattr(web_search_module, "_get_tavily_client", lambda: _Tavily())
+    monkeypatch.setattr(settings, "web_warehouse_enabled", True)
+
+    started = time.perf_counter()
+    results = web_search_module.web_search("warehouse write-behind", use_cache=False)
+    assert time.perf_counter() - started < 0.3
+    assert [r.url for r in results] == ["https://example.com/a"]
+    assert stored.wait(2)